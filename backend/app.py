@@ -1,12 +1,22 @@
 from flask import Flask, jsonify, request, make_response
 from flask_login import LoginManager
 from dotenv import load_dotenv
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 import logging
 from models import init_models
+from services.waiting_room import init_waiting_room
+from services.holds import start_hold_sweeper
+from services.analytics import start_stats_refresher
+from services.cache import init_cache
+from services.pricing import init_pricing
+from services.metrics import init_metrics
+from services.logging_config import init_logging
+from services.user_cache import init_user_cache, load_cached_user
+from services.rate_limit import init_rate_limiter
+from services.avatars import init_avatars
+from services.database import configure_database
 
-# configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 # load environment variables
@@ -15,9 +25,8 @@ load_dotenv()
 # initialize the application
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 
-# create a folder for avatars if it doesn't exist
+# avatars are stored here and served from /static/avatars
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'avatars')
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
 ALLOWED_ORIGINS = [
@@ -31,12 +40,93 @@ ALLOWED_ORIGINS = [
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///instance/ticketarena.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# connection pool per worker process: by default the server threads (SERVER_THREADS, see serve.py) plus background threads.
+# with a server database keep SERVER_WORKERS * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below its connection limit
+app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', str(int(os.getenv('SERVER_THREADS', '8')) + 4)))
+app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+app.config['DB_POOL_TIMEOUT'] = int(os.getenv('DB_POOL_TIMEOUT', '30'))  # seconds to wait for a free connection
+app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # seconds before a server connection is replaced
+# SQLite: WAL journal so reads continue during writes, and milliseconds a writer waits for the lock before "database is locked"
+app.config['SQLITE_WAL'] = os.getenv('SQLITE_WAL', 'true').lower() in ('1', 'true', 'yes')
+app.config['SQLITE_BUSY_TIMEOUT'] = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))
 app.config['SESSION_COOKIE_SECURE'] = False
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['PERMANENT_SESSION_LIFETIME'] = 3600
 app.config['WTF_CSRF_ENABLED'] = False
 
+# waiting room in front of POST /api/bookings for hot on-sales
+app.config['WAITING_ROOM_ENABLED'] = os.getenv('WAITING_ROOM_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+app.config['WAITING_ROOM_RATE'] = float(os.getenv('WAITING_ROOM_RATE', '50'))  # admissions per second per event
+app.config['WAITING_ROOM_ADMIT_TTL'] = int(os.getenv('WAITING_ROOM_ADMIT_TTL', '300'))  # seconds to use an admission
+
+# group commit: bookings are written by one thread, many per transaction
+app.config['BOOKING_GROUP_COMMIT'] = os.getenv('BOOKING_GROUP_COMMIT', 'false').lower() in ('1', 'true', 'yes')
+app.config['BOOKING_GROUP_COMMIT_MAX_BATCH'] = int(os.getenv('BOOKING_GROUP_COMMIT_MAX_BATCH', '100'))
+app.config['BOOKING_GROUP_COMMIT_MAX_WAIT_MS'] = float(os.getenv('BOOKING_GROUP_COMMIT_MAX_WAIT_MS', '5'))
+
+# pending bookings hold their seats for BOOKING_HOLD_TTL seconds; 0 disables the in-process sweeper
+app.config['BOOKING_HOLD_TTL'] = int(os.getenv('BOOKING_HOLD_TTL', '900'))
+app.config['HOLD_SWEEP_INTERVAL'] = int(os.getenv('HOLD_SWEEP_INTERVAL', '30'))
+
+# sales rollup behind GET /api/admin/stats is rebuilt every STATS_REFRESH_INTERVAL seconds; 0 leaves it to refresh_stats.py (cron)
+app.config['STATS_REFRESH_INTERVAL'] = int(os.getenv('STATS_REFRESH_INTERVAL', '300'))
+
+# request metrics for GET /api/admin/metrics; a sample of requests can also be profiled with cProfile
+app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN', '')  # bearer token for scrapers without an admin session
+app.config['METRICS_PROFILE_SAMPLE_RATE'] = float(os.getenv('METRICS_PROFILE_SAMPLE_RATE', '0'))  # 0.01 = 1% of requests
+app.config['METRICS_PROFILE_DIR'] = os.getenv('METRICS_PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'profiles'))
+
+# logged-in users are cached per process for USER_CACHE_TTL seconds instead of loaded on every request; 0 disables
+app.config['USER_CACHE_TTL'] = int(os.getenv('USER_CACHE_TTL', '60'))
+app.config['USER_CACHE_MAX_ENTRIES'] = int(os.getenv('USER_CACHE_MAX_ENTRIES', '10000'))
+
+# password hashing runs in a process pool of PASSWORD_HASH_WORKERS (0 = inline in the request thread);
+# at most PASSWORD_HASH_MAX_PENDING hashes wait or run at once, further logins get 503.
+# changing PASSWORD_HASH_METHOD (e.g. pbkdf2:sha256:1000000 or scrypt:32768:8:1) rehashes passwords on the next login
+app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '32'))
+app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))  # seconds
+
+# token bucket rate limits per route group, "<group>.<user|ip>=<requests>/<seconds>"; the groups are bookings (POST /api/bookings),
+# login and register. buckets live in memory (per process), sqlite (shared on one host), redis (shared) or none
+app.config['RATE_LIMIT_BACKEND'] = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+app.config['RATE_LIMITS'] = os.getenv('RATE_LIMITS', 'bookings.user=10/10,bookings.ip=100/10,login.ip=20/60,register.ip=5/600')
+app.config['RATE_LIMIT_MAX_ENTRIES'] = int(os.getenv('RATE_LIMIT_MAX_ENTRIES', '100000'))
+app.config['RATE_LIMIT_SQLITE_PATH'] = os.getenv('RATE_LIMIT_SQLITE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'ratelimit.db'))
+app.config['RATE_LIMIT_REDIS_URL'] = os.getenv('RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0')
+# number of reverse proxies in front of the app whose X-Forwarded-For/-Proto are trusted; 0 (the default) trusts none.
+# without it, behind a proxy request.remote_addr is the proxy and every client shares its ip buckets
+app.config['TRUSTED_PROXY_HOPS'] = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
+
+# avatars: originals up to AVATAR_MAX_BYTES, resized to square WebP variants of AVATAR_SIZES pixels by AVATAR_WORKERS
+# background threads; avatar_url points at the first size. AVATAR_BASE_URL may be a CDN in front of static/avatars,
+# unset it is this app's origin + /static/avatars, so the URLs also work from the frontend's origin
+app.config['AVATAR_BASE_URL'] = os.getenv('AVATAR_BASE_URL', '').rstrip('/')
+app.config['AVATAR_MAX_BYTES'] = int(os.getenv('AVATAR_MAX_BYTES', str(10 * 1024 * 1024)))
+app.config['AVATAR_SIZES'] = [int(size) for size in os.getenv('AVATAR_SIZES', '256,64').split(',')]
+app.config['AVATAR_WEBP_QUALITY'] = int(os.getenv('AVATAR_WEBP_QUALITY', '80'))
+app.config['AVATAR_WORKERS'] = int(os.getenv('AVATAR_WORKERS', '2'))
+
+# response cache for the public event endpoints: memory (per process), redis (shared) or none
+app.config['CACHE_BACKEND'] = os.getenv('CACHE_BACKEND', 'memory')
+app.config['CACHE_TTL'] = int(os.getenv('CACHE_TTL', '30'))
+app.config['CACHE_MAX_ENTRIES'] = int(os.getenv('CACHE_MAX_ENTRIES', '1024'))
+app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+# booking prices: per-event price tables cached in memory, and group discounts as "min_seats:percent,..."
+app.config['PRICE_CACHE_TTL'] = int(os.getenv('PRICE_CACHE_TTL', '60'))
+app.config['PRICE_QUANTITY_DISCOUNTS'] = os.getenv('PRICE_QUANTITY_DISCOUNTS', '')
+
+# logging: debug (plain text, everything at DEBUG) or production (JSON lines through a non-blocking queue, INFO)
+app.config['LOG_MODE'] = os.getenv('LOG_MODE', 'debug')
+app.config['LOG_LEVEL'] = os.getenv('LOG_LEVEL', '')  # overrides the mode's root level
+app.config['LOG_LEVELS'] = os.getenv('LOG_LEVELS', '')  # per module, e.g. werkzeug=WARNING,routes.events=INFO
+app.config['LOG_SAMPLE'] = os.getenv('LOG_SAMPLE', '')  # fraction of sub-WARNING records kept, e.g. routes.bookings=0.01
+init_logging(app)
+
 # handle CORS preflight (OPTIONS) — intercept before any route or login logic
 @app.before_request
 def handle_preflight():
@@ -47,10 +137,16 @@ def handle_preflight():
             response.headers['Access-Control-Allow-Origin'] = origin
             response.headers['Access-Control-Allow-Credentials'] = 'true'
             response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Accept'
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Accept, X-Queue-Token, If-None-Match'
             response.headers['Access-Control-Max-Age'] = '3600'
             return response
 
+# start the expired hold sweeper with the first request, so scripts importing the app do not run it
+@app.before_request
+def start_background_jobs():
+    start_hold_sweeper(app)
+    start_stats_refresher(app)
+
 # add CORS headers to ALL responses (including 401/403 from Flask-Login)
 @app.after_request
 def add_cors_headers(response):
@@ -59,11 +155,24 @@ def add_cors_headers(response):
         response.headers['Access-Control-Allow-Origin'] = origin
         response.headers['Access-Control-Allow-Credentials'] = 'true'
         response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Accept'
+        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Accept, X-Queue-Token, If-None-Match'
+        response.headers['Access-Control-Expose-Headers'] = 'ETag'
     return response
 
+# restore the client address and scheme set by trusted proxies before anything reads them
+if app.config['TRUSTED_PROXY_HOPS'] > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_HOPS'], x_proto=app.config['TRUSTED_PROXY_HOPS'])
+
 # initialize extensions
+configure_database(app)
 db = init_models(app)
+init_waiting_room(app)
+init_cache(app)
+init_pricing(app)
+init_metrics(app)
+init_user_cache(app)
+init_rate_limiter(app)
+init_avatars(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'auth.login'
 login_manager.session_protection = "basic"
@@ -81,7 +190,7 @@ from models.ticket import Ticket
 @login_manager.user_loader
 def load_user(user_id):
     try:
-        return User.query.get(int(user_id))
+        return load_cached_user(user_id)
     except Exception as e:
         logger.error(f"Error loading user: {str(e)}")
         return None
@@ -99,6 +208,7 @@ from routes.bookings import bookings_bp
 from routes.admin import admin_bp
 from routes.profile import profile_bp
 from routes.reset_password import reset_password_bp
+from routes.queue import queue_bp
 
 app.register_blueprint(auth_bp)
 app.register_blueprint(events_bp)
@@ -106,10 +216,12 @@ app.register_blueprint(bookings_bp)
 app.register_blueprint(admin_bp)
 app.register_blueprint(profile_bp)
 app.register_blueprint(reset_password_bp)
+app.register_blueprint(queue_bp)
 
 @app.route('/api/test')
 def test():
     return {'message': 'API works!'}
 
+# development server with the reloader; use serve.py in production
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,31 @@
+# authentication overhead per request: loading the user from the database vs the user cache
+# usage: python benchmarks/bench_auth_overhead.py [requests]
+import sys
+
+from common import app, setup_database, create_user, session_headers, count_queries, timed, percentile
+from services.cache import MemoryCache, NullCache
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+ENDPOINTS = ['/api/auth/check', '/api/bookings?per_page=1']
+
+
+def main():
+    setup_database()
+    with app.app_context():
+        create_user('buyer')
+    client = app.test_client()
+    headers = session_headers(client, 'buyer@bench.local')
+
+    print(f'{"user loader":>12} {"endpoint":>26} {"queries":>8} {"p50 ms":>10} {"p95 ms":>10}')
+    for label, cache in [('database', NullCache()), ('cached', MemoryCache(ttl=60))]:
+        app.extensions['user_cache'] = cache
+        for url in ENDPOINTS:
+            client.get(url, headers=headers)  # warm the cache
+            with app.app_context(), count_queries() as queries:
+                client.get(url, headers=headers)
+            latencies = timed(lambda: client.get(url, headers=headers), repeat=REQUESTS)
+            print(f'{label:>12} {url:>26} {queries["count"]:>8} {percentile(latencies, 50):>10.3f} {percentile(latencies, 95):>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
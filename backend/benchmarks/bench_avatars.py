@@ -0,0 +1,78 @@
+# avatar uploads: request latency, background variant time, and bytes a page downloads per avatar
+# usage: python benchmarks/bench_avatars.py [uploads]
+import io
+import os
+import sys
+import time
+import random
+import tempfile
+
+from PIL import Image
+
+from common import app, setup_database, create_user, login, timed, percentile
+from services.avatars import avatar_hash, make_variants
+
+UPLOADS = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+
+def camera_photo(seed):
+    # a 12 megapixel JPEG with enough noise to compress like a photo
+    random.seed(seed)
+    image = Image.effect_noise((4000, 3000), 64).convert('RGB')
+    image.paste((random.randrange(256), random.randrange(256), random.randrange(256)), (0, 0, 2000, 1500))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def main():
+    setup_database()
+    client = app.test_client()
+    with app.app_context():
+        user = create_user('fan')
+        # the user instance is detached once the context ends, so log in while it is still loaded
+        login(client, user.email)
+
+    # avatars go to a throwaway static folder, like the database
+    static_folder = tempfile.mkdtemp(prefix='ticketarena-bench-static-')
+    app.static_folder = static_folder
+    folder = app.config['UPLOAD_FOLDER'] = os.path.join(static_folder, 'avatars')
+    os.makedirs(folder)
+
+    photos = [camera_photo(i) for i in range(UPLOADS)]
+    print(f'uploads: {UPLOADS}, original size: {sum(map(len, photos)) / len(photos) / 1024:.0f} KB on average')
+
+    def upload(photo):
+        response = client.put('/api/users/profile', content_type='multipart/form-data',
+                              data={'avatar': (io.BytesIO(photo), 'photo.jpg')})
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    pending = list(photos)
+    latencies = timed(lambda: upload(pending.pop(0)), repeat=UPLOADS)
+    print(f'upload request: p50 {percentile(latencies, 50):.1f} ms, p95 {percentile(latencies, 95):.1f} ms')
+    start = time.perf_counter()
+    app.extensions['avatar_processor'].close()
+    print(f'background variants finished {(time.perf_counter() - start) * 1000:.0f} ms after the last upload returned')
+
+    # the variant step on its own, as one pool thread runs it
+    scratch = tempfile.mkdtemp(prefix='ticketarena-bench-variants-')
+    for i, photo in enumerate(photos):
+        with open(os.path.join(scratch, f'{i:016x}.jpg'), 'wb') as out:
+            out.write(photo)
+    start = time.perf_counter()
+    for i in range(UPLOADS):
+        variants = make_variants(scratch, f'{i:016x}.jpg', app.config['AVATAR_SIZES'], app.config['AVATAR_WEBP_QUALITY'])
+    print(f'variants {app.config["AVATAR_SIZES"]}: {(time.perf_counter() - start) * 1000 / UPLOADS:.1f} ms per avatar')
+    for size, variant in sorted(variants.items()):
+        print(f'  {size}px: {os.path.getsize(os.path.join(scratch, variant)) / 1024:.1f} KB')
+
+    avatar_url = client.get('/api/users/profile').get_json()['avatar_url']
+    response = client.get(avatar_url)
+    print(f'avatar served: {len(response.data) / 1024:.1f} KB ({avatar_url.rsplit("/", 1)[-1]}) instead of a '
+          f'{len(photos[-1]) / 1024:.0f} KB original, Cache-Control: {response.headers.get("Cache-Control")}')
+    leftovers = [name for name in os.listdir(folder) if avatar_hash(name) != avatar_hash(avatar_url)]
+    print(f'files of superseded avatars left: {len(leftovers)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# admin bookings export: paging through /api/admin/bookings vs the streamed export, rows/sec and peak memory
+# usage: python benchmarks/bench_booking_export.py [bookings]
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import text
+from common import app, db, Event, Ticket, Booking, setup_database, create_user, login
+
+BOOKINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+PER_PAGE = 100
+# paging is timed on a sample of pages and extrapolated
+SAMPLE_PAGES = 50
+
+
+def seed(user_id):
+    event = Event(
+        title={'ru': 'Финал', 'en': 'Final'},
+        description={'ru': '', 'en': ''},
+        date=datetime(2030, 1, 1),
+        venue={'ru': 'Арена', 'en': 'Arena'},
+        category='football'
+    )
+    event.tickets.append(Ticket(category='standard', price=10, capacity=BOOKINGS))
+    db.session.add(event)
+    db.session.commit()
+    for start in range(0, BOOKINGS, 50000):
+        rows = [
+            {'user_id': user_id, 'event_id': event.id, 'total_price': 10,
+             'status': 'confirmed', 'created_at': datetime.now()}
+            for _ in range(min(50000, BOOKINGS - start))
+        ]
+        db.session.execute(Booking.__table__.insert(), rows)
+    db.session.execute(text(
+        'INSERT INTO booking_line (booking_id, ticket_id, quantity, unit_price) '
+        'SELECT booking.id, ticket.id, 1, ticket.price FROM booking JOIN ticket ON ticket.event_id = booking.event_id'
+    ))
+    db.session.commit()
+
+
+def stream(client, url):
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url, buffered=False)
+    lines = sum(chunk.count(b'\n') for chunk in response.response)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return lines, elapsed, peak
+
+
+def main():
+    setup_database()
+    client = app.test_client()
+    with app.app_context():
+        admin = create_user(name='admin', role='admin')
+        admin_email = admin.email  # the instance is detached once the context ends
+        seed(admin.id)
+    login(client, admin_email)
+
+    print(f'bookings: {BOOKINGS}')
+    print(f'{"mode":>22} {"rows":>10} {"seconds":>10} {"rows/sec":>10} {"peak MiB":>10}')
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for page in range(1, SAMPLE_PAGES + 1):
+        client.get(f'/api/admin/bookings?page={page}&per_page={PER_PAGE}')
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    rows = SAMPLE_PAGES * PER_PAGE
+    print(f'{"pages of to_dict()":>22} {rows:>10} {elapsed:>10.2f} {rows / elapsed:>10.0f} {peak / 2 ** 20:>10.1f}')
+
+    for label, url in [('stream NDJSON', '/api/admin/bookings/export'),
+                       ('stream CSV', '/api/admin/bookings/export?format=csv')]:
+        lines, elapsed, peak = stream(client, url)
+        rows = lines - (1 if 'csv' in url else 0)
+        assert rows == BOOKINGS, rows
+        print(f'{label:>22} {rows:>10} {elapsed:>10.2f} {rows / elapsed:>10.0f} {peak / 2 ** 20:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
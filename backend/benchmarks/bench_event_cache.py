@@ -0,0 +1,68 @@
+# public event endpoints: requests/sec with the response cache on and off
+# usage: python benchmarks/bench_event_cache.py [requests] [bookings every n requests]
+import sys
+import time
+from datetime import datetime, timedelta
+
+from common import app, db, Event, Ticket, setup_database, create_user, login
+from services.cache import MemoryCache, NullCache
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+BOOKING_EVERY = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+EVENTS = 24
+
+
+def seed_events():
+    events = []
+    for i in range(EVENTS):
+        event = Event(
+            title={'ru': f'Матч {i}', 'en': f'Match {i}'},
+            description={'ru': '', 'en': ''},
+            date=datetime(2030, 1, 1) + timedelta(days=i),
+            venue={'ru': 'Арена', 'en': 'Arena'},
+            category='football'
+        )
+        for category in ['VIP', 'standard', 'child']:
+            event.tickets.append(Ticket(category=category, price=10, capacity=100000))
+        events.append(event)
+    db.session.add_all(events)
+    db.session.commit()
+    return [event.id for event in events]
+
+
+def run(client, event_ids):
+    # mostly anonymous reads over a few listing pages and event pages, with an occasional booking
+    urls = [f'/api/events?page={page}' for page in (1, 2, 3)]
+    urls += [f'/api/events/{event_id}' for event_id in event_ids]
+    urls += [f'/api/events/{event_id}/tickets' for event_id in event_ids[:4]]
+    start = time.perf_counter()
+    for i in range(REQUESTS):
+        if BOOKING_EVERY and i % BOOKING_EVERY == BOOKING_EVERY - 1:
+            response = client.post('/api/bookings',
+                                   json={'event_id': event_ids[i % len(event_ids)], 'seats': ['VIP'], 'total_price': 10})
+            assert response.status_code == 201, response.get_data(as_text=True)
+        else:
+            assert client.get(urls[i % len(urls)]).status_code == 200
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def main():
+    setup_database()
+    client = app.test_client()
+    with app.app_context():
+        user = create_user()
+        event_ids = seed_events()
+        # the user instance is detached once the context ends, so log in while it is still loaded
+        login(client, user.email)
+
+    print(f'requests: {REQUESTS}, one booking every {BOOKING_EVERY} requests')
+    print(f'{"cache":>7} {"req/s":>8} {"hit rate":>9} {"invalidations":>14}')
+    for cache in (NullCache(), MemoryCache()):
+        app.extensions['cache'] = cache
+        rate = run(client, event_ids)
+        stats = cache.stats.to_dict()
+        print(f'{cache.name:>7} {rate:>8.1f} {stats["hit_rate"]:>9.2%} {stats["invalidations"]:>14}')
+
+
+if __name__ == '__main__':
+    main()
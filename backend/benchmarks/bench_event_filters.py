@@ -0,0 +1,63 @@
+# "events next week under 50 with seats left": filtering loaded events in Python vs filter_events in SQL
+# usage: python benchmarks/bench_event_filters.py [events]
+import sys
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import selectinload
+from werkzeug.datastructures import MultiDict
+from common import app, db, Event, Ticket, setup_database, count_queries, timed, percentile
+from models import TicketInventory
+from services.event_filters import filter_events
+
+EVENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+START = datetime(2030, 1, 1)
+ARGS = MultiDict({'date_from': '2030-03-01', 'date_to': '2030-03-07', 'max_price': '50', 'available_only': 'true'})
+
+
+def seed_events():
+    text = json.dumps({'ru': 'Событие', 'en': 'Event'})
+    events, tickets, inventory = [], [], []
+    for i in range(EVENTS):
+        events.append({'id': i + 1, 'title': text, 'description': text, 'venue': text, 'category': 'concert',
+                       'date': START + timedelta(minutes=30 * i), 'created_at': datetime.now(), 'revision': 0})
+        for j, price in enumerate((30 + i % 40, 60, 120)):
+            ticket_id = i * 3 + j + 1
+            tickets.append({'id': ticket_id, 'event_id': i + 1, 'category': f'c{j}', 'price': price,
+                            'capacity': 100, 'age_restriction': '0+'})
+            inventory.append({'ticket_id': ticket_id, 'sold': 0, 'held': 0, 'available': (i + j) % 3 * 50})
+    db.session.execute(Event.__table__.insert(), events)
+    db.session.execute(Ticket.__table__.insert(), tickets)
+    db.session.execute(TicketInventory.__table__.insert(), inventory)
+    db.session.commit()
+
+
+def python_filter():
+    # what the frontend does today: fetch everything and filter the loaded objects
+    date_from, date_to = datetime(2030, 3, 1), datetime(2030, 3, 8)
+    events = Event.query.options(selectinload(Event.tickets)).order_by(Event.date.desc()).all()
+    return [event for event in events if date_from <= event.date < date_to and any(
+        ticket.price <= 50 and ticket.available > 0 for ticket in event.tickets)][:8]
+
+
+def sql_filter():
+    return filter_events(Event.query.options(selectinload(Event.tickets)), ARGS).order_by(Event.date.desc()).limit(8).all()
+
+
+def main():
+    setup_database()
+    with app.app_context():
+        seed_events()
+        assert [e.id for e in python_filter()] == [e.id for e in sql_filter()]
+        print(f'events: {EVENTS}')
+        print(f'{"filter":>10} {"queries":>8} {"p50 ms":>10} {"p95 ms":>10}')
+        for label, fn in [('python', python_filter), ('sql', sql_filter)]:
+            db.session.expunge_all()
+            with count_queries() as queries:
+                fn()
+            latencies = timed(lambda: (db.session.expunge_all(), fn()), repeat=10)
+            print(f'{label:>10} {queries["count"]:>8} {percentile(latencies, 50):>10.1f} {percentile(latencies, 95):>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
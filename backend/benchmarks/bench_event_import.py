@@ -0,0 +1,68 @@
+# loading a season of fixtures: one POST /api/events per event vs the bulk NDJSON/CSV import, in rows/sec
+# usage: python benchmarks/bench_event_import.py [events]
+import sys
+import json
+import time
+from datetime import datetime, timedelta
+
+from common import app, Event, setup_database, create_user, login
+
+EVENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+# single POSTs are slow, so that path is timed on a sample
+SINGLE_SAMPLE = 500
+
+
+def fixture(i):
+    return {
+        'title': {'ru': f'Матч {i}', 'en': f'Match {i}'},
+        'description': {'ru': 'Тур сезона', 'en': 'Season round'},
+        'date': (datetime(2030, 1, 1) + timedelta(hours=i)).isoformat(),
+        'venue': {'ru': 'Арена', 'en': 'Arena'},
+        'category': 'football',
+        'tickets': [
+            {'category': 'VIP', 'price': 100, 'capacity': 50},
+            {'category': 'standard', 'price': 20, 'capacity': 500}
+        ]
+    }
+
+
+def main():
+    setup_database()
+    with app.app_context():
+        create_user('admin', role='admin')
+    client = login(app.test_client(), 'admin@bench.local')
+    print(f'{"mode":>22} {"rows":>8} {"seconds":>10} {"rows/sec":>10}')
+
+    start = time.perf_counter()
+    for i in range(SINGLE_SAMPLE):
+        response = client.post('/api/events', json=fixture(i))
+        assert response.status_code == 201, response.get_data(as_text=True)
+    elapsed = time.perf_counter() - start
+    print(f'{"POST /api/events":>22} {SINGLE_SAMPLE:>8} {elapsed:>10.2f} {SINGLE_SAMPLE / elapsed:>10.0f}')
+
+    body = ''.join(json.dumps(fixture(i), ensure_ascii=False) + '\n' for i in range(EVENTS))
+    start = time.perf_counter()
+    response = client.post('/api/admin/events/import', data=body.encode('utf-8'), content_type='application/x-ndjson')
+    elapsed = time.perf_counter() - start
+    report = response.get_json()
+    assert report['imported'] == EVENTS and not report['failed'], report
+    print(f'{"bulk import (NDJSON)":>22} {EVENTS:>8} {elapsed:>10.2f} {EVENTS / elapsed:>10.0f}')
+
+    start = time.perf_counter()
+    csv_body = client.get('/api/admin/events/export?format=csv').get_data()
+    elapsed = time.perf_counter() - start
+    print(f'{"export (CSV)":>22} {EVENTS + SINGLE_SAMPLE:>8} {elapsed:>10.2f} {(EVENTS + SINGLE_SAMPLE) / elapsed:>10.0f}')
+
+    start = time.perf_counter()
+    response = client.post('/api/admin/events/import?format=csv', data=csv_body, content_type='text/csv')
+    elapsed = time.perf_counter() - start
+    report = response.get_json()
+    assert report['imported'] == EVENTS + SINGLE_SAMPLE and not report['failed'], report
+    print(f'{"bulk import (CSV)":>22} {report["imported"]:>8} {elapsed:>10.2f} {report["imported"] / elapsed:>10.0f}')
+
+    with app.app_context():
+        assert Event.query.count() == 2 * (EVENTS + SINGLE_SAMPLE)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# GET /api/events: query count and latency as bookings per event grow
+# usage: python benchmarks/bench_event_listing.py
+import json
+import statistics
+from datetime import datetime, timedelta
+
+from common import app, db, Event, Ticket, Booking, setup_database, create_user, count_queries, timed
+
+EVENTS = 8
+BOOKING_LEVELS = [0, 10, 100, 1000]
+
+
+def seed_events(user_id):
+    events = []
+    for i in range(EVENTS):
+        event = Event(
+            title={'ru': f'Матч {i}', 'en': f'Match {i}'},
+            description={'ru': '', 'en': ''},
+            date=datetime(2030, 1, 1) + timedelta(days=i),
+            venue={'ru': 'Арена', 'en': 'Arena'},
+            category='football'
+        )
+        for category in ['VIP', 'standard', 'child']:
+            event.tickets.append(Ticket(category=category, price=10, capacity=100000))
+        events.append(event)
+    db.session.add_all(events)
+    db.session.commit()
+    return [event.id for event in events]
+
+
+def add_bookings(user_id, event_ids, count):
+    rows = [
+        {'user_id': user_id, 'event_id': event_id, 'seats': json.dumps(['VIP', 'standard']),
+         'total_price': 20, 'status': 'confirmed', 'created_at': datetime.now()}
+        for event_id in event_ids for _ in range(count)
+    ]
+    if rows:
+        db.session.execute(Booking.__table__.insert(), rows)
+        db.session.commit()
+
+
+def legacy_listing():
+    # the previous implementation: lazy tickets and bookings per row, JSON decode per booking
+    events = Event.query.order_by(Event.date.desc()).limit(EVENTS).all()
+    result = []
+    for event in events:
+        total = sum(ticket.capacity for ticket in event.tickets)
+        booked = sum(len(b.seats) for b in event.bookings if b.status != 'cancelled')
+        result.append({'tickets': [t.to_dict() for t in event.tickets], 'available_tickets': total - booked})
+    db.session.remove()
+    return result
+
+
+def main():
+    setup_database()
+    client = app.test_client()
+    with app.app_context():
+        user = create_user()
+        event_ids = seed_events(user.id)
+        added = 0
+        print(f'{"bookings/event":>15} {"queries":>8} {"p50 ms":>8} {"legacy queries":>15} {"legacy p50 ms":>14}')
+        for level in BOOKING_LEVELS:
+            add_bookings(user.id, event_ids, level - added)
+            added = level
+
+            with count_queries() as stats:
+                response = client.get(f'/api/events?per_page={EVENTS}')
+            assert response.status_code == 200
+            latencies = timed(lambda: client.get(f'/api/events?per_page={EVENTS}'))
+
+            with count_queries() as legacy_stats:
+                legacy_listing()
+            legacy_latencies = timed(legacy_listing, repeat=5)
+
+            print(f'{level:>15} {stats["count"]:>8} {statistics.median(latencies):>8.2f} '
+                  f'{legacy_stats["count"]:>15} {statistics.median(legacy_latencies):>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
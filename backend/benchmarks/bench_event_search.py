@@ -0,0 +1,76 @@
+# event search at 100k events: LIKE over the JSON text columns vs the FTS5 index
+# usage: python benchmarks/bench_event_search.py [events]
+import sys
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+from common import app, db, Event, setup_database, timed, percentile
+from models import EventText
+from services.search import apply_search, create_search_index, rebuild_search_index
+
+EVENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+CITIES = [('Астана', 'Astana'), ('Алматы', 'Almaty'), ('Караганда', 'Karaganda'), ('Шымкент', 'Shymkent')]
+KINDS = [('Финал', 'Final', 'football'), ('Концерт', 'Concert', 'concert'), ('Спектакль', 'Play', 'theater')]
+PHRASES = ['final', 'конц', 'almaty play', 'финал астана']
+
+
+def seed_events():
+    start_date = datetime(2030, 1, 1)
+    for start in range(0, EVENTS, 10000):
+        events, texts = [], []
+        for i in range(start, min(start + 10000, EVENTS)):
+            city, kind = CITIES[i % len(CITIES)], KINDS[i % len(KINDS)]
+            title = {'ru': f'{kind[0]} {i}', 'en': f'{kind[1]} {i}'}
+            venue = {'ru': f'Арена {city[0]}', 'en': f'{city[1]} Arena'}
+            description = {'ru': f'{kind[0]} в городе {city[0]}', 'en': f'{kind[1]} in {city[1]}'}
+            events.append({
+                'id': i + 1, 'title': json.dumps(title), 'description': json.dumps(description),
+                'venue': json.dumps(venue), 'date': start_date + timedelta(hours=i), 'category': kind[2],
+                'created_at': datetime.now(), 'revision': 0
+            })
+            for lang in ('ru', 'en'):
+                texts.append({'event_id': i + 1, 'lang': lang, 'title': title[lang],
+                              'description': description[lang], 'venue': venue[lang]})
+        db.session.execute(Event.__table__.insert(), events)
+        db.session.execute(EventText.__table__.insert(), texts)
+    db.session.commit()
+
+
+def like_search(phrase):
+    # the alternative without an index: every word LIKE-matched against the JSON columns
+    query = Event.query
+    for word in phrase.split():
+        pattern = f'%{word}%'
+        query = query.filter(or_(Event._title.ilike(pattern), Event._description.ilike(pattern), Event._venue.ilike(pattern)))
+    return query.order_by(Event.date.desc()).limit(8).all()
+
+
+def fts_search(phrase, filtered=False):
+    query = Event.query
+    if filtered:
+        query = query.filter(Event.category == 'football', Event.date >= datetime(2031, 1, 1), Event.date < datetime(2033, 1, 1))
+    return apply_search(query, phrase).limit(8).all()
+
+
+def main():
+    setup_database()
+    with app.app_context():
+        seed_events()
+        if not create_search_index():
+            print('this SQLite build has no FTS5')
+            return
+        rebuild_search_index()
+        db.session.commit()
+        print(f'events: {EVENTS}')
+        print(f'{"phrase":>16} {"mode":>18} {"p50 ms":>10} {"p95 ms":>10}')
+        for phrase in PHRASES:
+            for label, fn in [('LIKE on JSON', lambda: like_search(phrase)),
+                              ('FTS5', lambda: fts_search(phrase)),
+                              ('FTS5 + filters', lambda: fts_search(phrase, filtered=True))]:
+                latencies = timed(lambda: (db.session.expunge_all(), fn()), repeat=20)
+                print(f'{phrase:>16} {label:>18} {percentile(latencies, 50):>10.2f} {percentile(latencies, 95):>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
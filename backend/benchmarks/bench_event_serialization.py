@@ -0,0 +1,84 @@
+# Event.to_dict() over 10k loaded events: JSON decoded per access vs once per row vs ?lang= texts
+# usage: python benchmarks/bench_event_serialization.py [events]
+import sys
+import json
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import defer, selectinload
+from common import app, db, Event, Ticket, setup_database
+from models import EventText
+
+EVENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+
+def seed_events():
+    description = {'ru': 'Описание матча ' * 10, 'en': 'Match description ' * 10}
+    for start in range(0, EVENTS, 1000):
+        events = []
+        for i in range(start, min(start + 1000, EVENTS)):
+            event = Event(
+                title={'ru': f'Матч {i}', 'en': f'Match {i}'},
+                description=description,
+                date=datetime(2030, 1, 1) + timedelta(hours=i),
+                venue={'ru': 'Арена', 'en': 'Arena'},
+                category='football'
+            )
+            for category in ['VIP', 'standard', 'child']:
+                event.tickets.append(Ticket(category=category, price=10, capacity=100))
+            events.append(event)
+        db.session.add_all(events)
+        db.session.commit()
+        db.session.expunge_all()
+
+
+def legacy_to_dict(event):
+    # the previous properties: json.loads on every access of title, description and venue
+    return {
+        'id': event.id,
+        'title': json.loads(event._title),
+        'description': json.loads(event._description),
+        'date': event.date.isoformat(),
+        'venue': json.loads(event._venue),
+        'category': event.category,
+        'image_url': event.image_url,
+        'created_at': event.created_at.isoformat(),
+        'tickets': [ticket.to_dict() for ticket in event.tickets],
+        'available_tickets': event.get_available_tickets()
+    }
+
+
+def measure(label, events, serialize):
+    start = time.perf_counter()
+    payload = [serialize(event) for event in events]
+    elapsed = (time.perf_counter() - start) * 1000
+    size = len(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+    print(f'{label:>28} {elapsed:>10.1f} {elapsed * 1000 / len(events):>10.2f} {size / 1024:>10.0f}')
+
+
+def main():
+    setup_database()
+    with app.app_context():
+        seed_events()
+        print(f'events: {EVENTS}')
+        print(f'{"to_dict":>28} {"total ms":>10} {"us/row":>10} {"KiB":>10}')
+
+        events = Event.query.options(selectinload(Event.tickets)).all()
+        measure('legacy (decode per access)', events, legacy_to_dict)
+        db.session.expunge_all()
+
+        events = Event.query.options(selectinload(Event.tickets)).all()
+        measure('decode once, first pass', events, lambda event: event.to_dict())
+        measure('decode once, second pass', events, lambda event: event.to_dict())
+        db.session.expunge_all()
+
+        events = Event.query.options(
+            selectinload(Event.tickets),
+            defer(Event._title), defer(Event._description), defer(Event._venue),
+            selectinload(Event.texts.and_(EventText.lang == 'en'))
+        ).all()
+        measure('?lang=en', events, lambda event: event.to_dict('en'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# POST /api/bookings throughput: one commit per booking vs group commit
+# usage: python benchmarks/bench_group_commit.py [threads] [bookings per thread]
+import sys
+import time
+import statistics
+import threading
+from collections import Counter
+from datetime import datetime
+
+from common import app, db, Event, Ticket, setup_database, create_user, session_cookie, session_client, percentile
+from services.inventory import rebuild_inventory
+
+THREADS = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+PER_THREAD = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+
+
+def seed_event():
+    event = Event(
+        title={'ru': 'Финал', 'en': 'Final'},
+        description={'ru': '', 'en': ''},
+        date=datetime(2030, 1, 1),
+        venue={'ru': 'Арена', 'en': 'Arena'},
+        category='football'
+    )
+    for category in ['VIP', 'standard']:
+        event.tickets.append(Ticket(category=category, price=10, capacity=THREADS * PER_THREAD * 4))
+    db.session.add(event)
+    db.session.commit()
+    return event.id
+
+
+def run(event_id, cookie, group_commit):
+    app.config['BOOKING_GROUP_COMMIT'] = group_commit
+    statuses = Counter()
+    latencies = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(THREADS)
+
+    def buyer():
+        client = session_client(cookie)
+        payload = {'event_id': event_id, 'seats': ['VIP', 'standard'], 'total_price': 20}
+        start_gate.wait()
+        for _ in range(PER_THREAD):
+            start = time.perf_counter()
+            response = client.post('/api/bookings', json=payload)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                statuses[response.status_code] += 1
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=buyer) for _ in range(THREADS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses, latencies, time.perf_counter() - started
+
+
+def main():
+    setup_database()
+    with app.app_context():
+        user = create_user()
+        event_id = seed_event()
+        cookie = session_cookie(app.test_client(), user.email)
+
+    print(f'threads: {THREADS}, bookings per thread: {PER_THREAD}')
+    print(f'{"mode":>12} {"201":>6} {"errors":>7} {"bookings/s":>11} {"p50 ms":>8} {"p99 ms":>8}')
+    for group_commit in (False, True):
+        statuses, latencies, wall = run(event_id, cookie, group_commit)
+        errors = sum(count for code, count in statuses.items() if code != 201)
+        assert statuses[201] > 0, f'no booking succeeded: {dict(statuses)}'
+        print(f'{"group" if group_commit else "per-request":>12} {statuses[201]:>6} {errors:>7} '
+              f'{statuses[201] / wall:>11.1f} {statistics.median(latencies):>8.1f} {percentile(latencies, 99):>8.1f}')
+
+    with app.app_context():
+        assert not rebuild_inventory(), 'inventory counters drifted from bookings'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# expire_holds: sweep time as the booking table grows, with a fixed number of expired holds
+# usage: python benchmarks/bench_hold_sweep.py
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from common import app, db, Event, Ticket, Booking, setup_database, create_user
+from services.holds import expire_holds
+from services.inventory import rebuild_inventory
+
+TABLE_SIZES = [10000, 100000, 1000000]
+EXPIRED = 1000
+
+
+def seed_event():
+    event = Event(
+        title={'ru': 'Финал', 'en': 'Final'},
+        description={'ru': '', 'en': ''},
+        date=datetime(2030, 1, 1),
+        venue={'ru': 'Арена', 'en': 'Arena'},
+        category='football'
+    )
+    event.tickets.append(Ticket(category='standard', price=10, capacity=10 ** 7))
+    db.session.add(event)
+    db.session.commit()
+    return event.id
+
+
+def add_bookings(user_id, event_id, count, status, expires_at):
+    last_id = db.session.query(db.func.max(Booking.id)).scalar() or 0
+    for start in range(0, count, 50000):
+        rows = [
+            {'user_id': user_id, 'event_id': event_id, 'total_price': 10,
+             'status': status, 'created_at': datetime.now(), 'expires_at': expires_at}
+            for _ in range(min(50000, count - start))
+        ]
+        db.session.execute(Booking.__table__.insert(), rows)
+    # one 'standard' seat per booking
+    db.session.execute(text(
+        'INSERT INTO booking_line (booking_id, ticket_id, quantity, unit_price) '
+        'SELECT booking.id, ticket.id, 1, ticket.price FROM booking JOIN ticket ON ticket.event_id = booking.event_id '
+        'WHERE booking.id > :last_id'
+    ), {'last_id': last_id})
+    db.session.commit()
+
+
+def main():
+    setup_database()
+    with app.app_context():
+        user = create_user()
+        event_id = seed_event()
+        plan = db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM booking WHERE expires_at <= :now AND status = 'pending' ORDER BY expires_at"
+        ), {'now': datetime.utcnow()}).fetchall()
+        print('sweep query plan:', '; '.join(row[-1] for row in plan))
+
+        size = 0
+        print(f'{"bookings":>10} {"expired":>8} {"sweep ms":>9}')
+        for target in TABLE_SIZES:
+            add_bookings(user.id, event_id, target - size - EXPIRED, 'confirmed', None)
+            add_bookings(user.id, event_id, EXPIRED, 'pending', datetime.utcnow() - timedelta(minutes=1))
+            size = target
+            rebuild_inventory(fix=True)
+
+            start = time.perf_counter()
+            released = expire_holds()
+            elapsed = (time.perf_counter() - start) * 1000
+            assert released == EXPIRED
+            print(f'{size:>10} {released:>8} {elapsed:>9.1f}')
+
+        assert not rebuild_inventory(), 'inventory counters drifted from bookings'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# request latency with debug logging vs production logging (JSON through a non-blocking queue)
+# usage: python benchmarks/bench_logging.py [requests]
+import sys
+import logging
+import tempfile
+from datetime import datetime
+
+from common import app, db, Event, Ticket, setup_database, create_user, session_headers, timed, percentile
+from services.cache import NullCache
+from services.logging_config import configure_logging
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+
+def seed_event():
+    event = Event(
+        title={'ru': 'Финал', 'en': 'Final'},
+        description={'ru': 'Описание ' * 50, 'en': 'Description ' * 50},
+        date=datetime(2030, 1, 1),
+        venue={'ru': 'Арена', 'en': 'Arena'},
+        category='football'
+    )
+    event.tickets.append(Ticket(category='standard', price=10, capacity=10 ** 6))
+    db.session.add(event)
+    db.session.commit()
+    return event.id
+
+
+def main():
+    setup_database()
+    with app.app_context():
+        event_id = seed_event()
+        create_user('buyer')
+    client = app.test_client()
+    headers = session_headers(client, 'buyer@bench.local')
+    # every GET goes through serialization, as on a cache miss
+    app.extensions['cache'] = NullCache()
+    payload = {'event_id': event_id, 'seats': ['standard', 'standard'], 'total_price': 20}
+
+    # the common module silences logging; turn it back on and write to a real file, as a server would
+    logging.disable(logging.NOTSET)
+    print(f'{"mode":>12} {"endpoint":>22} {"p50 ms":>10} {"p95 ms":>10}')
+    for mode in ('debug', 'production'):
+        with tempfile.TemporaryFile('w') as log_file:
+            configure_logging(mode=mode, stream=log_file)
+            for label, request in [
+                ('POST /api/bookings', lambda: client.post('/api/bookings', json=payload, headers=headers)),
+                ('GET /api/events/<id>', lambda: client.get(f'/api/events/{event_id}')),
+            ]:
+                latencies = timed(request, repeat=REQUESTS)
+                print(f'{mode:>12} {label:>22} {percentile(latencies, 50):>10.2f} {percentile(latencies, 95):>10.2f}')
+            configure_logging(mode='debug', stream=sys.stderr)
+    logging.disable(logging.WARNING)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# GET /api/admin/bookings: page latency by depth, OFFSET pagination vs cursor mode
+# usage: python benchmarks/bench_pagination.py [bookings]
+import sys
+import json
+import statistics
+from datetime import datetime
+
+from common import app, db, Event, Ticket, Booking, setup_database, create_user, login, timed
+from services.pagination import encode_cursor
+
+BOOKINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+PER_PAGE = 20
+DEPTHS = [1, 100, 1000, 10000, BOOKINGS // PER_PAGE - 1]
+
+
+def seed(user_id):
+    event = Event(
+        title={'ru': 'Финал', 'en': 'Final'},
+        description={'ru': '', 'en': ''},
+        date=datetime(2030, 1, 1),
+        venue={'ru': 'Арена', 'en': 'Arena'},
+        category='football'
+    )
+    event.tickets.append(Ticket(category='standard', price=10, capacity=BOOKINGS))
+    db.session.add(event)
+    db.session.commit()
+
+    seats = json.dumps(['standard'])
+    for start in range(0, BOOKINGS, 50000):
+        rows = [
+            {'user_id': user_id, 'event_id': event.id, 'seats': seats, 'total_price': 10,
+             'status': 'confirmed', 'created_at': datetime.now()}
+            for _ in range(min(50000, BOOKINGS - start))
+        ]
+        db.session.execute(Booking.__table__.insert(), rows)
+    db.session.commit()
+
+
+def main():
+    setup_database()
+    client = app.test_client()
+    with app.app_context():
+        admin = create_user(name='admin', role='admin')
+        admin_email = admin.email  # the instance is detached once the context ends
+        seed(admin.id)
+        max_id = db.session.query(db.func.max(Booking.id)).scalar()
+    login(client, admin_email)
+
+    print(f'bookings: {BOOKINGS}, per page: {PER_PAGE}')
+    print(f'{"page":>8} {"offset p50 ms":>14} {"cursor p50 ms":>14}')
+    for depth in DEPTHS:
+        offset_url = f'/api/admin/bookings?page={depth}&per_page={PER_PAGE}'
+        # the cursor a client would hold after walking to this page
+        cursor = encode_cursor([max_id - (depth - 1) * PER_PAGE + 1]) if depth > 1 else ''
+        cursor_url = f'/api/admin/bookings?cursor={cursor}&per_page={PER_PAGE}'
+
+        offset_page = client.get(offset_url).get_json()['items']
+        cursor_page = client.get(cursor_url).get_json()['items']
+        assert [b['id'] for b in offset_page] == [b['id'] for b in cursor_page]
+
+        offset_ms = statistics.median(timed(lambda: client.get(offset_url), repeat=5))
+        cursor_ms = statistics.median(timed(lambda: client.get(cursor_url), repeat=5))
+        print(f'{depth:>8} {offset_ms:>14.2f} {cursor_ms:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# login burst vs booking latency: password hashing inline in the request threads vs in a process pool
+# usage: python benchmarks/bench_password_hashing.py [login threads] [booking threads] [seconds]
+import sys
+import time
+import threading
+from collections import Counter
+from datetime import datetime
+
+from common import app, db, Event, Ticket, setup_database, create_user, session_cookie, session_client, percentile
+
+LOGIN_THREADS = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+BOOKING_THREADS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+SECONDS = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+MODES = [('no logins', None), ('inline', 0), ('pool x2', 2), ('pool x4', 4)]
+
+
+def seed_event():
+    event = Event(
+        title={'ru': 'Финал', 'en': 'Final'},
+        description={'ru': '', 'en': ''},
+        date=datetime(2030, 1, 1),
+        venue={'ru': 'Арена', 'en': 'Arena'},
+        category='football'
+    )
+    event.tickets.append(Ticket(category='standard', price=10, capacity=10 ** 7))
+    db.session.add(event)
+    db.session.commit()
+    return event.id
+
+
+def use_hasher(workers):
+    hasher = app.extensions.pop('password_hasher', None)
+    if hasher is not None:
+        hasher.close()
+    app.config['PASSWORD_HASH_WORKERS'] = workers or 0
+
+
+def run(event_id, cookie, workers):
+    use_hasher(workers)
+    logins = Counter()
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + SECONDS
+
+    def login_burst():
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            response = client.post('/api/auth/login', json={'email': 'fan@bench.local', 'password': 'bench'})
+            with lock:
+                logins[response.status_code] += 1
+
+    def buyer():
+        client = session_client(cookie)
+        payload = {'event_id': event_id, 'seats': ['standard']}
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = client.post('/api/bookings', json=payload)
+            assert response.status_code == 201, response.get_data(as_text=True)
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=buyer) for _ in range(BOOKING_THREADS)]
+    if workers is not None:
+        threads += [threading.Thread(target=login_burst) for _ in range(LOGIN_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return logins, latencies
+
+
+def main():
+    setup_database()
+    with app.app_context():
+        create_user('fan')
+        buyer = create_user('buyer')
+        event_id = seed_event()
+        cookie = session_cookie(app.test_client(), buyer.email)
+
+    print(f'login threads: {LOGIN_THREADS}, booking threads: {BOOKING_THREADS}, {SECONDS:.0f}s per mode, '
+          f'method: {app.config["PASSWORD_HASH_METHOD"]}')
+    print(f'{"hashing":>10} {"logins/s":>9} {"503":>6} {"bookings/s":>11} {"p50 ms":>8} {"p99 ms":>8}')
+    for label, workers in MODES:
+        logins, latencies = run(event_id, cookie, workers)
+        print(f'{label:>10} {logins[200] / SECONDS:>9.1f} {logins[503]:>6} {len(latencies) / SECONDS:>11.1f} '
+              f'{percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f}')
+    use_hasher(0)
+
+
+if __name__ == '__main__':
+    main()
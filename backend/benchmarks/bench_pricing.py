@@ -0,0 +1,55 @@
+# pricing a 100-seat group order: per-seat loop over event.tickets vs the cached price table
+# usage: python benchmarks/bench_pricing.py
+from datetime import datetime
+
+from common import app, db, Event, Ticket, setup_database, count_queries, timed, percentile
+from services.inventory import find_ticket
+from services.pricing import get_price_book
+
+CATEGORIES = ['VIP', 'standard', 'child', 'student', 'family']
+SEATS = [CATEGORIES[i % len(CATEGORIES)] for i in range(100)]
+
+
+def seed_event():
+    event = Event(
+        title={'ru': 'Финал', 'en': 'Final'},
+        description={'ru': '', 'en': ''},
+        date=datetime(2030, 1, 1),
+        venue={'ru': 'Арена', 'en': 'Arena'},
+        category='football'
+    )
+    for i, category in enumerate(CATEGORIES):
+        event.tickets.append(Ticket(category=category, price=10 + i, capacity=1000))
+    db.session.add(event)
+    db.session.commit()
+    return event.id
+
+
+def legacy_total(event_id):
+    # the previous approach: load the event and look up the ticket for every seat
+    event = Event.query.get(event_id)
+    return sum(find_ticket(event, category).price for category in SEATS)
+
+
+def report(label, fn):
+    db.session.expunge_all()
+    with count_queries() as queries:
+        fn()
+    latencies = timed(lambda: (db.session.expunge_all(), fn()), repeat=200)
+    print(f'{label:>24} {queries["count"]:>8} {percentile(latencies, 50):>10.3f} {percentile(latencies, 95):>10.3f}')
+
+
+def main():
+    setup_database()
+    with app.app_context():
+        event_id = seed_event()
+        price_book = get_price_book()
+        assert legacy_total(event_id) == price_book.quote(event_id, SEATS).total
+        print(f'{"pricing":>24} {"queries":>8} {"p50 ms":>10} {"p95 ms":>10}')
+        report('per-seat loop', lambda: legacy_total(event_id))
+        report('quote, cold table', lambda: (price_book.invalidate(event_id), price_book.quote(event_id, SEATS)))
+        report('quote, cached table', lambda: price_book.quote(event_id, SEATS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# rate limiter: cost of one check per bucket store, and buyer latency while a bot hammers POST /api/bookings
+# usage: python benchmarks/bench_rate_limit.py [bot threads] [buyer threads] [seconds]
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from datetime import datetime
+
+from common import app, db, Event, Ticket, BENCH_DB, setup_database, create_user, session_cookie, percentile
+from services.rate_limit import MemoryBuckets, RateLimiter, SQLiteBuckets, parse_limits
+
+BOT_THREADS = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+BUYER_THREADS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+SECONDS = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+CHECKS = 100000
+LIMITS = 'bookings.user=10/10,bookings.ip=100/10'
+
+
+def seed_event():
+    event = Event(
+        title={'ru': 'Финал', 'en': 'Final'},
+        description={'ru': '', 'en': ''},
+        date=datetime(2030, 1, 1),
+        venue={'ru': 'Арена', 'en': 'Arena'},
+        category='football'
+    )
+    event.tickets.append(Ticket(category='standard', price=10, capacity=10 ** 7))
+    db.session.add(event)
+    db.session.commit()
+    return event.id
+
+
+def check_cost(store):
+    # a limit that never trips, so every call does the full refill-and-take
+    limiter = RateLimiter(store, {('login', 'ip'): (1e9, 10 ** 9)})
+    start = time.perf_counter()
+    for i in range(CHECKS):
+        limiter.check('login', None, f'10.0.{i % 256}.{i // 256 % 256}')
+    return (time.perf_counter() - start) / CHECKS * 1e6
+
+
+def client_for(ip, cookie=None):
+    # a test client whose requests come from ip, logged in when given a session cookie
+    client = app.test_client()
+    client.environ_base['REMOTE_ADDR'] = ip
+    if cookie:
+        client.set_cookie('session', cookie)
+    return client
+
+
+def run(event_id, bot_cookie, buyers, limiter):
+    app.extensions['rate_limiter'] = limiter
+    bot_statuses = Counter()
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + SECONDS
+    payload = {'event_id': event_id, 'seats': ['standard']}
+
+    def bot():
+        client = client_for('203.0.113.7', bot_cookie)
+        while time.perf_counter() < deadline:
+            response = client.post('/api/bookings', json=payload)
+            with lock:
+                bot_statuses[response.status_code] += 1
+
+    def buyer(ip, cookie):
+        # a person books every half second or so
+        client = client_for(ip, cookie)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = client.post('/api/bookings', json=payload)
+            assert response.status_code == 201, response.get_data(as_text=True)
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.5)
+
+    threads = [threading.Thread(target=bot) for _ in range(BOT_THREADS)]
+    threads += [threading.Thread(target=buyer, args=buyer_args) for buyer_args in buyers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return bot_statuses, latencies
+
+
+def main():
+    setup_database()
+    with app.app_context():
+        bot = create_user('bot')
+        event_id = seed_event()
+        bot_cookie = session_cookie(client_for('203.0.113.7'), bot.email)
+        buyers = []
+        for i in range(BUYER_THREADS):
+            ip = f'198.51.100.{i + 1}'
+            user = create_user(f'buyer{i}')
+            buyers.append((ip, session_cookie(client_for(ip), user.email)))
+
+    print(f'check cost: memory {check_cost(MemoryBuckets()):.2f} us, '
+          f'sqlite {check_cost(SQLiteBuckets(os.path.join(os.path.dirname(BENCH_DB), "ratelimit.db"))):.2f} us')
+
+    print(f'bot threads: {BOT_THREADS}, buyer threads: {BUYER_THREADS}, {SECONDS:.0f}s per mode, limits: {LIMITS}')
+    print(f'{"limiter":>8} {"bot 201":>8} {"bot 429":>8} {"buyer bookings":>15} {"p50 ms":>8} {"p99 ms":>8}')
+    for label, limiter in [('off', None), ('memory', RateLimiter(MemoryBuckets(), parse_limits(LIMITS)))]:
+        bot_statuses, latencies = run(event_id, bot_cookie, buyers, limiter)
+        print(f'{label:>8} {bot_statuses[201]:>8} {bot_statuses[429]:>8} {len(latencies):>15} '
+              f'{percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f}')
+    app.extensions['rate_limiter'] = None
+
+
+if __name__ == '__main__':
+    main()
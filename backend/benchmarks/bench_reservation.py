@@ -0,0 +1,81 @@
+# POST /api/bookings: concurrent buyers racing for the last seats of one event
+# usage: python benchmarks/bench_reservation.py [buyers] [capacity]
+import sys
+import time
+import statistics
+import threading
+from collections import Counter
+from datetime import datetime
+
+from common import app, db, Event, Ticket, Booking, setup_database, create_user, session_cookie, session_client, percentile
+from services.inventory import rebuild_inventory
+
+BUYERS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+CAPACITY = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+
+def seed_event():
+    event = Event(
+        title={'ru': 'Финал', 'en': 'Final'},
+        description={'ru': '', 'en': ''},
+        date=datetime(2030, 1, 1),
+        venue={'ru': 'Арена', 'en': 'Arena'},
+        category='football'
+    )
+    event.tickets.append(Ticket(category='standard', price=10, capacity=CAPACITY))
+    db.session.add(event)
+    db.session.commit()
+    return event.id
+
+
+def main():
+    setup_database()
+    with app.app_context():
+        user = create_user()
+        event_id = seed_event()
+        cookie = session_cookie(app.test_client(), user.email)
+
+    statuses = Counter()
+    latencies = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(BUYERS)
+
+    def buyer():
+        client = session_client(cookie)
+        start_gate.wait()
+        start = time.perf_counter()
+        response = client.post('/api/bookings',
+                               json={'event_id': event_id, 'seats': ['standard'], 'total_price': 10})
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            statuses[response.status_code] += 1
+            latencies.append(elapsed)
+
+    threads = [threading.Thread(target=buyer) for _ in range(BUYERS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    with app.app_context():
+        booked = sum(len(b.seats) for b in Booking.query.filter_by(event_id=event_id))
+        ticket = Ticket.query.filter_by(event_id=event_id).one()
+        mismatches = rebuild_inventory()
+        remaining = ticket.capacity
+
+    print(f'buyers: {BUYERS}, capacity: {CAPACITY}, wall: {wall:.2f}s')
+    print(f'responses: {dict(sorted(statuses.items()))}')
+    print(f'latency ms: p50 {statistics.median(latencies):.1f}, p99 {percentile(latencies, 99):.1f}')
+    print(f'booked seats: {booked}, remaining capacity: {remaining}, inventory mismatches: {len(mismatches)}')
+
+    assert booked <= CAPACITY, 'oversold'
+    assert statuses[201] == min(BUYERS, CAPACITY), 'not every seat that was available got booked'
+    assert booked + remaining == CAPACITY, 'capacity drifted from bookings'
+    assert statuses[201] == booked and not mismatches
+    print('OK: no oversell')
+
+
+if __name__ == '__main__':
+    main()
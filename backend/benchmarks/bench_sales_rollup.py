@@ -0,0 +1,67 @@
+# sales analytics: rollup refresh time at 5M bookings, and GET /api/admin/stats latency against the rollup
+# usage: python benchmarks/bench_sales_rollup.py [bookings]
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+from common import app, db, Event, Ticket, setup_database, create_user, login, timed, percentile
+from services.analytics import refresh_sales_rollup
+
+BOOKINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000000
+EVENTS = 200
+CATEGORIES = [('VIP', 100), ('standard', 20), ('child', 10)]
+
+
+def seed(user_id):
+    for i in range(EVENTS):
+        event = Event(
+            title={'ru': f'Матч {i}', 'en': f'Match {i}'},
+            description={'ru': '', 'en': ''},
+            date=datetime(2030, 1, 1),
+            venue={'ru': 'Арена', 'en': 'Arena'},
+            category='football'
+        )
+        for category, price in CATEGORIES:
+            event.tickets.append(Ticket(category=category, price=price, capacity=BOOKINGS))
+        db.session.add(event)
+    db.session.commit()
+
+    # generated in SQL: bookings spread over events and a year of days, 70% confirmed, one line each
+    db.session.execute(text(
+        'INSERT INTO booking (user_id, event_id, seats, total_price, status, created_at, revision) '
+        'WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :count) '
+        "SELECT :user_id, i % :events + 1, '[]', 0, CASE WHEN i % 10 < 7 THEN 'confirmed' ELSE 'cancelled' END, "
+        "datetime('2029-01-01', '+' || (i % 365) || ' days'), 0 FROM n"
+    ), {'count': BOOKINGS, 'user_id': user_id, 'events': EVENTS})
+    db.session.execute(text(
+        'INSERT INTO booking_line (booking_id, ticket_id, quantity, unit_price) '
+        'SELECT booking.id, ticket.id, booking.id % 4 + 1, ticket.price FROM booking '
+        'JOIN ticket ON ticket.event_id = booking.event_id AND ticket.id % 3 = booking.id % 3'
+    ))
+    db.session.commit()
+
+
+def main():
+    setup_database()
+    client = app.test_client()
+    with app.app_context():
+        admin = create_user(name='admin', role='admin')
+        admin_email = admin.email  # the instance is detached once the context ends
+        start = time.perf_counter()
+        seed(admin.id)
+        print(f'bookings: {BOOKINGS} (seeded in {time.perf_counter() - start:.1f}s)')
+        for attempt in range(3):
+            state = refresh_sales_rollup()
+            print(f'rollup refresh #{attempt + 1}: {state.seconds:.2f}s')
+    login(client, admin_email)
+
+    stats = client.get('/api/admin/stats').get_json()
+    assert stats['bookings'] == BOOKINGS, stats['bookings']
+    latencies = timed(lambda: client.get('/api/admin/stats'), repeat=50)
+    print(f'GET /api/admin/stats: p50 {percentile(latencies, 50):.2f} ms, p95 {percentile(latencies, 95):.2f} ms')
+    print(f"revenue {stats['revenue']}, tickets sold {stats['tickets_sold']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# production server load test: requests/sec for GET /api/events and POST /api/bookings across worker counts
+# usage: python benchmarks/bench_server.py [worker counts] [client processes] [seconds]
+#   e.g. python benchmarks/bench_server.py 1,2,4 8 10
+import os
+import sys
+import json
+import time
+import socket
+import subprocess
+import http.client
+from datetime import datetime
+from multiprocessing import Pool
+
+from common import app, db, Event, Ticket, BACKEND_DIR, setup_database, create_user, percentile
+
+WORKER_COUNTS = [int(n) for n in (sys.argv[1] if len(sys.argv) > 1 else '1,2,4').split(',')]
+CLIENTS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+SECONDS = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+THREADS = 8
+PORT = 5099
+EVENTS = 200
+
+
+def seed():
+    setup_database()
+    with app.app_context():
+        create_user('buyer')
+        for i in range(EVENTS):
+            event = Event(
+                title={'ru': f'Событие {i}', 'en': f'Event {i}'},
+                description={'ru': '', 'en': ''},
+                date=datetime(2030, 1, 1 + i % 28),
+                venue={'ru': 'Арена', 'en': 'Arena'},
+                category='football'
+            )
+            event.tickets.append(Ticket(category='standard', price=10, capacity=10 ** 7))
+            db.session.add(event)
+        db.session.commit()
+        return Event.query.first().id
+
+
+def start_server(workers):
+    env = dict(os.environ, SERVER_BIND=f'127.0.0.1:{PORT}', SERVER_WORKERS=str(workers), SERVER_THREADS=str(THREADS),
+               LOG_LEVEL='WARNING', CACHE_BACKEND='none', HOLD_SWEEP_INTERVAL='0', STATS_REFRESH_INTERVAL='0')
+    server = subprocess.Popen([sys.executable, 'serve.py'], cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', PORT), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError('server did not start')
+
+
+def login():
+    conn = http.client.HTTPConnection('127.0.0.1', PORT)
+    conn.request('POST', '/api/auth/login', json.dumps({'email': 'buyer@bench.local', 'password': 'bench'}),
+                 {'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    response.read()
+    assert response.status == 200, response.status
+    return response.getheader('Set-Cookie').split(';', 1)[0]
+
+
+def client(args):
+    # one keep-alive connection per client process, requests back to back until the deadline
+    method, path, body, cookie, deadline = args
+    conn = http.client.HTTPConnection('127.0.0.1', PORT)
+    headers = {'Content-Type': 'application/json', 'Cookie': cookie}
+    ok, errors, latencies = 0, 0, []
+    while time.time() < deadline:
+        start = time.perf_counter()
+        conn.request(method, path, body, headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status < 400:
+            ok += 1
+        else:
+            errors += 1
+    return ok, errors, latencies
+
+
+def load(pool, method, path, body, cookie):
+    deadline = time.time() + SECONDS
+    results = pool.map(client, [(method, path, body, cookie, deadline)] * CLIENTS)
+    latencies = [latency for _, _, client_latencies in results for latency in client_latencies]
+    return sum(r[0] for r in results), sum(r[1] for r in results), latencies
+
+
+def main():
+    event_id = seed()
+    targets = [
+        ('GET /api/events', 'GET', '/api/events?per_page=20', None),
+        ('POST /api/bookings', 'POST', '/api/bookings', json.dumps({'event_id': event_id, 'seats': ['standard']})),
+    ]
+    print(f'client processes: {CLIENTS}, threads per worker: {THREADS}, {SECONDS:.0f}s per run')
+    print(f'{"workers":>8} {"endpoint":>20} {"req/s":>9} {"errors":>7} {"p50 ms":>8} {"p99 ms":>8}')
+    with Pool(CLIENTS) as pool:
+        for workers in WORKER_COUNTS:
+            server = start_server(workers)
+            try:
+                cookie = login()
+                for label, method, path, body in targets:
+                    ok, errors, latencies = load(pool, method, path, body, cookie)
+                    print(f'{workers:>8} {label:>20} {ok / SECONDS:>9.1f} {errors:>7} '
+                          f'{percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f}')
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# POST /api/bookings under a simulated on-sale burst, with and without the waiting room
+# usage: python benchmarks/bench_waiting_room.py [buyers] [admissions per second]
+import sys
+import time
+import threading
+from collections import Counter
+from datetime import datetime
+
+from common import app, db, Event, Ticket, setup_database, create_user, session_cookie, session_client, percentile
+
+BUYERS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+RATE = float(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+
+def seed_event():
+    event = Event(
+        title={'ru': 'Финал', 'en': 'Final'},
+        description={'ru': '', 'en': ''},
+        date=datetime(2030, 1, 1),
+        venue={'ru': 'Арена', 'en': 'Arena'},
+        category='football'
+    )
+    event.tickets.append(Ticket(category='standard', price=10, capacity=BUYERS * 10))
+    db.session.add(event)
+    db.session.commit()
+    return event.id
+
+
+def run_burst(event_id, cookie, queued):
+    app.config['WAITING_ROOM_ENABLED'] = queued
+    statuses = Counter()  # POST /api/bookings responses only
+    queue_failures = Counter()  # buyers never admitted, by the status that stopped them
+    booking_latencies = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(BUYERS)
+
+    def buyer():
+        client = session_client(cookie)
+        payload = {'event_id': event_id, 'seats': ['standard'], 'total_price': 10}
+        start_gate.wait()
+        if queued:
+            # joining answers 201, polling 200; both carry the queue status
+            response = client.post(f'/api/events/{event_id}/queue')
+            while response.status_code in (200, 201) and not response.get_json()['admitted']:
+                time.sleep(min(max(response.get_json()['eta'], 0.01), 0.5))
+                response = client.get(f"/api/queue/{response.get_json()['token']}")
+            if response.status_code not in (200, 201):
+                with lock:
+                    queue_failures[response.status_code] += 1
+                return
+            payload['queue_token'] = response.get_json()['token']
+        start = time.perf_counter()
+        response = client.post('/api/bookings', json=payload)
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            statuses[response.status_code] += 1
+            booking_latencies.append(elapsed)
+
+    threads = [threading.Thread(target=buyer) for _ in range(BUYERS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    return statuses, queue_failures, booking_latencies, wall
+
+
+def main():
+    setup_database()
+    with app.app_context():
+        user = create_user()
+        event_id = seed_event()
+        cookie = session_cookie(app.test_client(), user.email)
+    app.extensions['waiting_room'].rate = RATE
+
+    print(f'buyers: {BUYERS}, waiting room rate: {RATE:g}/s')
+    print(f'{"mode":>8} {"201":>6} {"errors":>7} {"not admitted":>13} {"bookings/s":>11} {"p50 ms":>8} {"p99 ms":>8} {"wall s":>7}')
+    for queued in (False, True):
+        statuses, queue_failures, latencies, wall = run_burst(event_id, cookie, queued)
+        errors = sum(count for code, count in statuses.items() if code != 201)
+        print(f'{"queued" if queued else "direct":>8} {statuses[201]:>6} {errors:>7} {sum(queue_failures.values()):>13} '
+              f'{statuses[201] / wall:>11.1f} {percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f} {wall:>7.2f}')
+        assert statuses[201], f'no booking succeeded: {dict(statuses)}'
+
+
+if __name__ == '__main__':
+    main()
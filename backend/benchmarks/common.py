@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import logging
+import tempfile
+from contextlib import contextmanager
+
+# benchmarks run against a throwaway SQLite database, never the real one
+BENCH_DB = os.path.join(tempfile.mkdtemp(prefix='ticketarena-bench-'), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{BENCH_DB}'
+# benchmark clients send bursts from one user and address; bench_rate_limit.py switches the limiter on itself
+os.environ['RATE_LIMIT_BACKEND'] = 'none'
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import event as sa_event
+from app import app, db
+from models import User, Event, Ticket, Booking
+
+logging.disable(logging.WARNING)
+
+
+def setup_database():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+
+def create_user(name='bench', email=None, role='user'):
+    user = User(name=name, email=email or f'{name}@bench.local', role=role)
+    user.set_password('bench')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def login(client, email, password='bench'):
+    response = client.post('/api/auth/login', json={'email': email, 'password': password})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return client
+
+
+def session_cookie(client, email, password='bench'):
+    # log in once and return the session cookie value, so other clients can share the login without re-hashing
+    response = client.post('/api/auth/login', json={'email': email, 'password': password})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    for header in response.headers.getlist('Set-Cookie'):
+        if header.startswith('session='):
+            return header.split(';', 1)[0].split('=', 1)[1]
+    raise AssertionError('login did not set a session cookie')
+
+
+def session_client(cookie):
+    # a new test client logged in with a cookie from session_cookie; a Cookie request header would not do,
+    # the client replaces it with the contents of its own cookie jar
+    client = app.test_client()
+    client.set_cookie('session', cookie)
+    return client
+
+
+def session_headers(client, email, password='bench'):
+    # log the client in; the returned Cookie header only works for this client or raw HTTP requests
+    return {'Cookie': f'session={session_cookie(client, email, password)}'}
+
+
+@contextmanager
+def count_queries():
+    # counts SQL statements sent to the engine inside the block
+    stats = {'count': 0}
+
+    def before_cursor_execute(*args):
+        stats['count'] += 1
+
+    engine = db.engine
+    sa_event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield stats
+    finally:
+        sa_event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def timed(fn, repeat=20):
+    # returns per-call latencies in milliseconds
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
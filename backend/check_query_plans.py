@@ -0,0 +1,84 @@
+import os
+import re
+import sys
+import tempfile
+
+# the check builds its own throwaway SQLite database from the migrations, never touching the real one
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='ticketarena-plans-'), 'plans.db')
+
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from app import app, db
+from models import Booking, BookingLine, Event, EventText, Ticket
+from migrations import upgrade_database
+from services.event_filters import filter_events
+from services.pagination import keyset_filter
+from werkzeug.datastructures import MultiDict
+
+# a plan line for a full table scan (no index) or a sort of the whole result
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+$')
+SORT = 'USE TEMP B-TREE'
+
+
+def hot_queries():
+    # the query shapes of the listing and booking endpoints; values do not matter for the plan
+    now = datetime.utcnow()
+    event_cursor = keyset_filter([Event.date, Event.id], [now, 100])
+    return {
+        'GET /api/bookings': Booking.query.filter_by(user_id=1).order_by(Booking.id.desc()).limit(10),
+        'GET /api/bookings?cursor=': Booking.query.filter_by(user_id=1).filter(
+            keyset_filter([Booking.id], [100])).order_by(Booking.id.desc()).limit(11),
+        'GET /api/bookings (ETag)': db.session.query(func.count(Booking.id), func.max(Booking.id)).join(
+            Event, Booking.event_id == Event.id).filter(Booking.user_id == 1),
+        'GET /api/events': Event.query.order_by(Event.date.desc()).limit(8),
+        'GET /api/events?category=': Event.query.filter_by(category='football').order_by(Event.date.desc()).limit(8),
+        'GET /api/events?date=': Event.query.filter(Event.date >= now, Event.date < now).order_by(Event.date.desc()).limit(8),
+        'GET /api/events?cursor=': Event.query.filter(event_cursor).order_by(Event.date.desc(), Event.id.desc()).limit(9),
+        'GET /api/events?category=&cursor=': Event.query.filter_by(category='football').filter(
+            event_cursor).order_by(Event.date.desc(), Event.id.desc()).limit(9),
+        'GET /api/events?date_from=&max_price=&available_only=': filter_events(Event.query, MultiDict({
+            'date_from': '2030-01-01', 'date_to': '2030-01-07', 'max_price': '50', 'available_only': 'true'
+        })).order_by(Event.date.desc()).limit(8),
+        'GET /api/events?lang= (texts)': EventText.query.filter(EventText.event_id.in_([1, 2]), EventText.lang == 'en'),
+        'booking lines': BookingLine.query.filter(BookingLine.booking_id.in_([1, 2])),
+        'event tickets': Ticket.query.filter_by(event_id=1),
+        'reservation ticket lookup': Ticket.query.filter_by(event_id=1, category='VIP'),
+        'DELETE /api/events/<id> booking check': Booking.query.filter_by(event_id=1).limit(1),
+        'hold sweep': Booking.query.filter(Booking.expires_at <= now, Booking.status == 'pending').order_by(
+            Booking.expires_at).limit(1000)
+    }
+
+
+def query_plan(query):
+    # IN lists are "expanding" parameters; render them as one placeholder per value, or SQLite is handed
+    # the internal __[POSTCOMPILE_...] marker
+    compiled = query.statement.compile(db.engine, compile_kwargs={'render_postcompile': True})
+    params = [None] * len(compiled.positiontup or [])
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', tuple(params)).fetchall()
+    return [row[-1] for row in rows]
+
+
+def check_query_plans():
+    with app.app_context():
+        upgrade_database()
+        failures = 0
+        for name, query in hot_queries().items():
+            try:
+                plan = query_plan(query)
+            except OperationalError as e:
+                # a query that cannot be explained is reported with the others instead of ending the check
+                print(f"{'ERR':>4}  {name}: {e.orig}")
+                failures += 1
+                continue
+            problems = [line for line in plan if FULL_SCAN.match(line) or SORT in line]
+            print(f"{'FAIL' if problems else 'ok':>4}  {name}: {'; '.join(plan)}")
+            failures += bool(problems)
+        return failures
+
+if __name__ == '__main__':
+    failures = check_query_plans()
+    if failures:
+        print(f'{failures} queries scan a whole table, sort it or cannot be explained, add or fix an index')
+    sys.exit(1 if failures else 0)
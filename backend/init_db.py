@@ -3,11 +3,15 @@ from models.user import User
 from models.event import Event
 from models.booking import Booking
 from models.ticket import Ticket
+from services.inventory import rebuild_inventory
+from migrations import upgrade_database
 
 def init_db():
     with app.app_context():
-        # create all tables
-        db.create_all()
+        # create or upgrade the schema through the versioned migrations
+        applied = upgrade_database()
+        if applied:
+            print(f'Applied migrations: {", ".join(str(version) for version in applied)}')
         
         # check if the administrator exists
         admin = User.query.filter_by(email='admin@gmail.com').first()
@@ -23,6 +27,8 @@ def init_db():
             
         try:
             db.session.commit()
+            # create inventory counters for tickets that predate the inventory table
+            rebuild_inventory(fix=True)
             print('Database initialized successfully')
         except Exception as e:
             db.session.rollback()
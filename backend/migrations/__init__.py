@@ -0,0 +1,85 @@
+from datetime import datetime
+from importlib import import_module
+import logging
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.schema import CreateColumn
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# applied in this order; each module defines VERSION, DESCRIPTION and upgrade()
+MIGRATIONS = [
+    'v001_baseline',
+    'v002_booking_holds',
+    'v003_revisions',
+    'v004_hot_path_indexes',
+    'v005_event_texts',
+    'v006_booking_lines',
+    'v007_event_search',
+    'v008_ticket_price_index',
+    'v009_sales_rollup'
+]
+
+
+# applied versions; kept out of the models' metadata so db.create_all() never creates it
+schema_version = Table(
+    'schema_version', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+
+def load_migrations():
+    return [import_module(f'migrations.{name}') for name in MIGRATIONS]
+
+
+def current_version():
+    if not inspect(db.engine).has_table('schema_version'):
+        return 0
+    return db.session.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def upgrade_database():
+    # bring the schema up to the latest version; every migration commits together with its version row
+    schema_version.create(db.engine, checkfirst=True)
+
+    version = current_version()
+    applied = []
+    for migration in load_migrations():
+        if migration.VERSION <= version:
+            continue
+        logger.info(f"Applying migration {migration.VERSION}: {migration.DESCRIPTION}")
+        try:
+            migration.upgrade()
+            db.session.execute(schema_version.insert().values(
+                version=migration.VERSION, description=migration.DESCRIPTION, applied_at=datetime.utcnow()
+            ))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        applied.append(migration.VERSION)
+    return applied
+
+
+# helpers for migrations; all of them are safe to run against a schema that already has the change.
+# column DDL is compiled from SQLAlchemy types for the connected database, never written out as SQLite text
+
+def column_names(table):
+    return [column['name'] for column in inspect(db.engine).get_columns(table)]
+
+
+def add_column(table, column):
+    # column is a db.Column with its name, e.g. db.Column('revision', db.Integer, nullable=False, server_default='0')
+    if column.name not in column_names(table):
+        ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+        db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {ddl}'))
+
+
+def create_index(name, table, columns):
+    db.session.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(columns)})'))
+
+
+def drop_index(name):
+    db.session.execute(text(f'DROP INDEX IF EXISTS {name}'))
@@ -0,0 +1,10 @@
+from models import db
+
+VERSION = 1
+DESCRIPTION = 'create missing tables'
+
+
+def upgrade():
+    # creates tables that do not exist yet; on an empty database this is the whole current schema,
+    # and the later migrations find their changes already in place
+    db.create_all()
@@ -0,0 +1,14 @@
+from models import Booking, db
+from services.holds import hold_expiry
+from migrations import add_column, column_names
+
+VERSION = 2
+DESCRIPTION = 'booking hold expiry'
+
+
+def upgrade():
+    if 'expires_at' in column_names('booking'):
+        return
+    add_column('booking', db.Column('expires_at', db.DateTime))
+    # existing pending bookings get a fresh hold instead of keeping their seats forever
+    Booking.query.filter_by(status='pending').update({'expires_at': hold_expiry()}, synchronize_session=False)
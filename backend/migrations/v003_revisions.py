@@ -0,0 +1,10 @@
+from models import db
+from migrations import add_column
+
+VERSION = 3
+DESCRIPTION = 'event and booking revision counters'
+
+
+def upgrade():
+    add_column('event', db.Column('revision', db.Integer, nullable=False, server_default='0'))
+    add_column('booking', db.Column('revision', db.Integer, nullable=False, server_default='0'))
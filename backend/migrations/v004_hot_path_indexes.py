@@ -0,0 +1,19 @@
+from migrations import create_index, drop_index
+
+VERSION = 4
+DESCRIPTION = 'composite indexes for listing, booking and sweep queries'
+
+
+def upgrade():
+    # GET /api/bookings: WHERE user_id = ? ORDER BY id DESC (and the ETag aggregate)
+    create_index('ix_booking_user_id_id', 'booking', ['user_id', 'id'])
+    # per-event booking checks and inventory recounts: WHERE event_id = ? [AND status ...]
+    create_index('ix_booking_event_id_status', 'booking', ['event_id', 'status'])
+    # hold sweep: WHERE status = 'pending' AND expires_at <= ? ORDER BY expires_at
+    create_index('ix_booking_status_expires_at', 'booking', ['status', 'expires_at'])
+    drop_index('ix_booking_expires_at')
+    # GET /api/events: ORDER BY date DESC, id DESC, optionally WHERE category = ? or a date range
+    create_index('ix_event_date_id', 'event', ['date', 'id'])
+    create_index('ix_event_category_date_id', 'event', ['category', 'date', 'id'])
+    # tickets of an event, and reservations by (event, category)
+    create_index('ix_ticket_event_id_category', 'ticket', ['event_id', 'category'])
@@ -0,0 +1,28 @@
+from models import Event, EventText, db
+from models.event_text import LANGUAGES
+
+VERSION = 5
+DESCRIPTION = 'per-language event texts'
+
+# events backfilled per flush
+BATCH = 1000
+
+
+def upgrade():
+    EventText.__table__.create(db.engine, checkfirst=True)
+    while True:
+        events = Event.query.filter(~Event.texts.any()).order_by(Event.id).limit(BATCH).all()
+        if not events:
+            break
+        for event in events:
+            title, description, venue = event.title, event.description, event.venue
+            for lang in LANGUAGES:
+                db.session.add(EventText(
+                    event_id=event.id,
+                    lang=lang,
+                    title=title.get(lang) or '',
+                    description=description.get(lang) or '',
+                    venue=venue.get(lang) or ''
+                ))
+        db.session.flush()
+        db.session.expunge_all()
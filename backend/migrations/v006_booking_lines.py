@@ -0,0 +1,41 @@
+from collections import Counter
+from sqlalchemy import exists
+from models import Booking, BookingLine, Ticket, db
+from services.inventory import decode_seats
+
+VERSION = 6
+DESCRIPTION = 'booking lines instead of JSON seat lists'
+
+# bookings converted per bulk insert
+BATCH = 5000
+
+
+def upgrade():
+    BookingLine.__table__.create(db.engine, checkfirst=True)
+    # walk the bookings by id; the JSON column is left as it was, so the conversion can be re-checked
+    last_id = 0
+    while True:
+        rows = db.session.query(Booking.id, Booking.event_id, Booking._seats).filter(
+            Booking.id > last_id,
+            Booking._seats != '[]',
+            ~exists().where(BookingLine.booking_id == Booking.id)
+        ).order_by(Booking.id).limit(BATCH).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        tickets = {
+            (event_id, category): (ticket_id, price)
+            for ticket_id, event_id, category, price in db.session.query(
+                Ticket.id, Ticket.event_id, Ticket.category, Ticket.price
+            ).filter(Ticket.event_id.in_({row[1] for row in rows}))
+        }
+        lines = []
+        for booking_id, event_id, raw in rows:
+            for category, count in sorted(Counter(decode_seats(raw)).items()):
+                ticket = tickets.get((event_id, category))
+                if ticket is None:
+                    continue
+                lines.append({'booking_id': booking_id, 'ticket_id': ticket[0], 'quantity': count, 'unit_price': ticket[1]})
+        if lines:
+            db.session.execute(BookingLine.__table__.insert(), lines)
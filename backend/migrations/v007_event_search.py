@@ -0,0 +1,10 @@
+from services.search import create_search_index, rebuild_search_index
+
+VERSION = 7
+DESCRIPTION = 'full-text search index for events'
+
+
+def upgrade():
+    # without FTS5 (or on a database other than SQLite) nothing is created and search uses LIKE
+    if create_search_index():
+        rebuild_search_index()
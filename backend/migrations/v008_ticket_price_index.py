@@ -0,0 +1,9 @@
+from migrations import create_index
+
+VERSION = 8
+DESCRIPTION = 'ticket index for event price and availability filters'
+
+
+def upgrade():
+    # GET /api/events?min_price=&max_price=&available_only=: EXISTS (ticket WHERE event_id = ? AND price ...)
+    create_index('ix_ticket_event_id_price', 'ticket', ['event_id', 'price'])
@@ -0,0 +1,10 @@
+from models import RollupRefresh, SalesRollup, db
+
+VERSION = 9
+DESCRIPTION = 'sales rollup tables for the admin dashboard'
+
+
+def upgrade():
+    # filled by the first refresh (services/analytics.py or refresh_stats.py)
+    SalesRollup.__table__.create(db.engine, checkfirst=True)
+    RollupRefresh.__table__.create(db.engine, checkfirst=True)
@@ -10,6 +10,10 @@ def init_models(app):
 from .user import User
 from .event import Event
 from .booking import Booking
+from .booking_line import BookingLine
 from .ticket import Ticket
+from .inventory import TicketInventory
+from .event_text import EventText
+from .sales_rollup import SalesRollup, RollupRefresh
 
-__all__ = ['User', 'Event', 'Booking', 'Ticket', 'db', 'init_models'] 
\ No newline at end of file
+__all__ = ['User', 'Event', 'Booking', 'BookingLine', 'Ticket', 'TicketInventory', 'EventText', 'SalesRollup', 'RollupRefresh', 'db', 'init_models'] 
\ No newline at end of file
@@ -1,26 +1,35 @@
 from datetime import datetime
 from models import db
-import json
+from .json_text import JSONTextMixin
+
+class Booking(JSONTextMixin, db.Model):
+    # keep in sync with migrations/v004_hot_path_indexes.py
+    __table_args__ = (
+        db.Index('ix_booking_user_id_id', 'user_id', 'id'),
+        db.Index('ix_booking_event_id_status', 'event_id', 'status'),
+        db.Index('ix_booking_status_expires_at', 'status', 'expires_at'),
+    )
 
-class Booking(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
-    _seats = db.Column('seats', db.Text, nullable=False)  # JSON string with list of booked seats
+    # legacy JSON list of seat categories; migration 6 moved it into booking_line rows
+    _seats = db.Column('seats', db.Text, nullable=False, default='[]')
     total_price = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(20), default='pending')  # pending / confirmed / cancelled
     created_at = db.Column(db.DateTime, default=datetime.now)
+    expires_at = db.Column(db.DateTime)  # UTC; when a pending booking releases its seats
+    revision = db.Column(db.Integer, nullable=False, default=0)  # bumped on every status change
+    
+    # ticket categories and quantities, loaded with the booking in one extra query per result set
+    lines = db.relationship('BookingLine', backref='booking', lazy='selectin', cascade='all, delete-orphan', order_by='BookingLine.id')
     
     @property
     def seats(self):
-        try:
-            return json.loads(self._seats) if self._seats else []
-        except:
-            return []
-            
-    @seats.setter
-    def seats(self, value):
-        self._seats = json.dumps(value) if value else json.dumps([])
+        # one category name per seat, the shape clients have always received
+        if self.lines:
+            return [line.ticket.category for line in self.lines for _ in range(line.quantity)]
+        return self._decode('_seats', list)
     
     def to_dict(self):
         result = {
@@ -28,9 +37,11 @@ class Booking(db.Model):
             'user_id': self.user_id,
             'event_id': self.event_id,
             'seats': self.seats,
+            'lines': [line.to_dict() for line in self.lines],
             'total_price': self.total_price,
             'status': self.status,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at.isoformat(),
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
         }
         
         # safely add data from related models
@@ -0,0 +1,21 @@
+from models import db
+
+class BookingLine(db.Model):
+    # one row per ticket category in a booking, so seat counts and sales are SQL sums
+    __tablename__ = 'booking_line'
+
+    id = db.Column(db.Integer, primary_key=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey('booking.id', ondelete='CASCADE'), nullable=False, index=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False, index=True)
+    quantity = db.Column(db.Integer, nullable=False)
+    unit_price = db.Column(db.Float, nullable=False)  # ticket price when the booking was made
+
+    ticket = db.relationship('Ticket', lazy='joined')
+
+    def to_dict(self):
+        return {
+            'ticket_id': self.ticket_id,
+            'category': self.ticket.category if self.ticket else None,
+            'quantity': self.quantity,
+            'unit_price': self.unit_price
+        }
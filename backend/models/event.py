@@ -1,8 +1,19 @@
 from datetime import datetime
 import json
 from models import db
+from .event_text import EventText, LANGUAGES
+from .json_text import JSONTextMixin
+
+def empty_text():
+    return {'ru': '', 'en': ''}
+
+class Event(JSONTextMixin, db.Model):
+    # keep in sync with migrations/v004_hot_path_indexes.py
+    __table_args__ = (
+        db.Index('ix_event_date_id', 'date', 'id'),
+        db.Index('ix_event_category_date_id', 'category', 'date', 'id'),
+    )
 
-class Event(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     _title = db.Column('title', db.Text, nullable=False) 
     _description = db.Column('description', db.Text)  
@@ -11,51 +22,69 @@ class Event(db.Model):
     category = db.Column(db.String(50), nullable=False)  # football, basketball, hockey, tennis
     image_url = db.Column(db.String(500))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    revision = db.Column(db.Integer, nullable=False, default=0)  # bumped on every event, ticket or booking write
     
     # relationships
     tickets = db.relationship('Ticket', backref='event', lazy=True, cascade='all, delete-orphan')
     bookings = db.relationship('Booking', backref='event', lazy=True)
+    texts = db.relationship('EventText', backref='event', lazy=True, cascade='all, delete-orphan')
 
     @property
     def title(self):
-        try:
-            return json.loads(self._title) if self._title else {'ru': '', 'en': ''}
-        except:
-            return {'ru': '', 'en': ''}
+        return self._decode('_title', empty_text)
 
     @title.setter
     def title(self, value):
-        self._title = json.dumps(value) if value else json.dumps({'ru': '', 'en': ''})
+        self._title = json.dumps(value) if value else json.dumps(empty_text())
+        self._set_text('title', value)
 
     @property
     def description(self):
-        try:
-            return json.loads(self._description) if self._description else {'ru': '', 'en': ''}
-        except:
-            return {'ru': '', 'en': ''}
+        return self._decode('_description', empty_text)
 
     @description.setter
     def description(self, value):
-        self._description = json.dumps(value) if value else json.dumps({'ru': '', 'en': ''})
+        self._description = json.dumps(value) if value else json.dumps(empty_text())
+        self._set_text('description', value)
 
     @property
     def venue(self):
-        try:
-            return json.loads(self._venue) if self._venue else {'ru': '', 'en': ''}
-        except:
-            return {'ru': '', 'en': ''}
+        return self._decode('_venue', empty_text)
 
     @venue.setter
     def venue(self, value):
-        self._venue = json.dumps(value) if value else json.dumps({'ru': '', 'en': ''})
+        self._venue = json.dumps(value) if value else json.dumps(empty_text())
+        self._set_text('venue', value)
+
+    def _set_text(self, field, value):
+        # keep the per-language rows in step with the JSON column
+        value = value or {}
+        for lang in sorted(set(LANGUAGES) | set(value)):
+            text = next((t for t in self.texts if t.lang == lang), None)
+            if text is None:
+                text = EventText(lang=lang, title='', description='', venue='')
+                self.texts.append(text)
+            setattr(text, field, value.get(lang) or '')
+
+    def localized(self, lang):
+        # title/description/venue as plain strings in one language; events without
+        # per-language rows (created before the event_text table) fall back to the JSON columns
+        text = next((t for t in self.texts if t.lang == lang), None)
+        if text is not None:
+            return text.title, text.description, text.venue
+        return self.title.get(lang, ''), self.description.get(lang, ''), self.venue.get(lang, '')
     
-    def to_dict(self):
+    def to_dict(self, lang=None):
+        if lang:
+            title, description, venue = self.localized(lang)
+        else:
+            title, description, venue = self.title, self.description, self.venue
         return {
             'id': self.id,
-            'title': self.title,
-            'description': self.description,
+            'title': title,
+            'description': description,
             'date': self.date.isoformat(),
-            'venue': self.venue,
+            'venue': venue,
             'category': self.category,
             'image_url': self.image_url,
             'created_at': self.created_at.isoformat(),
@@ -64,17 +93,6 @@ class Event(db.Model):
         }
     
     def get_available_tickets(self):
-        # counting available tickets
-        total = sum(ticket.capacity for ticket in self.tickets)
-        
-        # safely count booked places
-        booked = 0
-        for booking in self.bookings:
-            try:
-                if booking.status != 'cancelled':  # consider only active bookings
-                    booked += len(booking.seats)
-            except Exception:
-                # if an error occurs when accessing seats, skip this booking
-                pass
-                
-        return total - booked 
\ No newline at end of file
+        # inventory counters are kept up to date by the booking routes,
+        # so this is a sum over ticket categories rather than over bookings
+        return sum(ticket.available for ticket in self.tickets) 
\ No newline at end of file
@@ -0,0 +1,14 @@
+from models import db
+
+# languages every event is stored in
+LANGUAGES = ('ru', 'en')
+
+class EventText(db.Model):
+    # one row per event and language, so listings for ?lang= read plain strings instead of JSON
+    __tablename__ = 'event_text'
+
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id', ondelete='CASCADE'), primary_key=True)
+    lang = db.Column(db.String(5), primary_key=True)
+    title = db.Column(db.Text, nullable=False, default='')
+    description = db.Column(db.Text, nullable=False, default='')
+    venue = db.Column(db.Text, nullable=False, default='')
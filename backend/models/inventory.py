@@ -0,0 +1,34 @@
+from models import db
+
+# booking status -> inventory counter holding its seats
+STATUS_COUNTERS = {
+    'pending': 'held',
+    'confirmed': 'sold'
+}
+
+class TicketInventory(db.Model):
+    __tablename__ = 'ticket_inventory'
+
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id', ondelete='CASCADE'), primary_key=True)
+    sold = db.Column(db.Integer, nullable=False, default=0)  # seats in confirmed bookings
+    held = db.Column(db.Integer, nullable=False, default=0)  # seats in pending bookings
+    available = db.Column(db.Integer, nullable=False, default=0)  # seats that can still be booked
+
+    def add(self, status, count):
+        # move seats into the counter of a booking status (cancelled seats go back to available)
+        counter = STATUS_COUNTERS.get(status or 'pending')
+        if counter:
+            setattr(self, counter, (getattr(self, counter) or 0) + count)
+        else:
+            self.available = (self.available or 0) + count
+
+    def remove(self, status, count):
+        self.add(status, -count)
+
+    def to_dict(self):
+        return {
+            'ticket_id': self.ticket_id,
+            'sold': self.sold,
+            'held': self.held,
+            'available': self.available
+        }
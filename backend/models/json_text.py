@@ -0,0 +1,17 @@
+import json
+
+class JSONTextMixin:
+    # JSON stored in Text columns, decoded once per loaded value: the parsed object is kept on the
+    # instance together with the raw string it came from, so a reload or a new assignment re-decodes
+
+    def _decode(self, column, default):
+        raw = getattr(self, column)
+        cached = self.__dict__.get('_decoded', {}).get(column)
+        if cached is not None and cached[0] is raw:
+            return cached[1]
+        try:
+            value = json.loads(raw) if raw else default()
+        except ValueError:
+            value = default()
+        self.__dict__.setdefault('_decoded', {})[column] = (raw, value)
+        return value
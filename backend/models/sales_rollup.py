@@ -0,0 +1,24 @@
+from models import db
+
+class SalesRollup(db.Model):
+    # confirmed sales per day and ticket category, rebuilt by services/analytics.py;
+    # the admin dashboard reads only this table, never the booking table
+    __tablename__ = 'sales_rollup'
+
+    day = db.Column(db.Date, primary_key=True)  # booking creation date
+    ticket_id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, nullable=False, index=True)
+    category = db.Column(db.String(50), nullable=False)
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+
+
+class RollupRefresh(db.Model):
+    # when a rollup was last rebuilt, and totals taken at that moment
+    __tablename__ = 'rollup_refresh'
+
+    name = db.Column(db.String(50), primary_key=True)
+    refreshed_at = db.Column(db.DateTime, nullable=False)  # UTC
+    seconds = db.Column(db.Float, nullable=False)  # duration of the rebuild
+    bookings = db.Column(db.Integer, nullable=False, default=0)  # all bookings, any status
@@ -1,12 +1,32 @@
 from models import db
+from .inventory import TicketInventory
 
 class Ticket(db.Model):
+    # keep in sync with migrations/v004_hot_path_indexes.py and v008_ticket_price_index.py
+    __table_args__ = (
+        db.Index('ix_ticket_event_id_category', 'event_id', 'category'),
+        db.Index('ix_ticket_event_id_price', 'event_id', 'price'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
     category = db.Column(db.String(50), nullable=False)  # VIP, standard, child
     price = db.Column(db.Float, nullable=False)
     capacity = db.Column(db.Integer, nullable=False)  # number of places in this category
     age_restriction = db.Column(db.String(10), nullable=False, default='0+')  # age restriction
+
+    # sold/held/available counters, loaded together with the ticket
+    inventory = db.relationship('TicketInventory', backref='ticket', uselist=False, lazy='joined', cascade='all, delete-orphan')
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.inventory is None:
+            self.inventory = TicketInventory(sold=0, held=0, available=self.capacity or 0)
+
+    @property
+    def available(self):
+        # tickets created before the inventory table fall back to the capacity column
+        return self.inventory.available if self.inventory else self.capacity
     
     def to_dict(self):
         return {
@@ -16,8 +16,9 @@ class User(UserMixin, db.Model):
     # relationships with other tables
     bookings = db.relationship('Booking', backref='user', lazy=True, cascade='all, delete-orphan')
     
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+    def set_password(self, password, method='pbkdf2:sha256'):
+        # hashes in the calling thread; request handlers go through services.passwords instead
+        self.password_hash = generate_password_hash(password, method=method)
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
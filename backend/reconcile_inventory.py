@@ -0,0 +1,21 @@
+import sys
+from app import app
+from services.inventory import rebuild_inventory
+
+def reconcile_inventory(fix=False):
+    with app.app_context():
+        mismatches = rebuild_inventory(fix=fix)
+        for mismatch in mismatches:
+            print(f"Ticket {mismatch['ticket_id']}: expected {mismatch['expected']}, stored {mismatch['actual']}")
+
+        if not mismatches:
+            print('Inventory counters are consistent with bookings')
+        elif fix:
+            print(f'Inventory counters rebuilt for {len(mismatches)} ticket categories')
+        else:
+            print(f'Found {len(mismatches)} inconsistent ticket categories, run with --fix to rebuild them')
+        return mismatches
+
+if __name__ == '__main__':
+    mismatches = reconcile_inventory(fix='--fix' in sys.argv)
+    sys.exit(1 if mismatches and '--fix' not in sys.argv else 0)
@@ -0,0 +1,12 @@
+from app import app
+from services.analytics import refresh_sales_rollup
+
+def refresh_stats():
+    # one rebuild of the sales rollup, for running from cron with STATS_REFRESH_INTERVAL=0
+    with app.app_context():
+        state = refresh_sales_rollup()
+        print(f'Sales rollup refreshed in {state.seconds}s ({state.bookings} bookings)')
+        return state
+
+if __name__ == '__main__':
+    refresh_stats()
@@ -1,6 +1,13 @@
-from flask import Blueprint, request, jsonify
+import hmac
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context
 from flask_login import login_required, current_user
-from models import User, Event, Booking, db
+from models import User, Event, db
+from services.analytics import sales_stats
+from services.cache import get_cache, invalidate_events
+from services.event_io import export_csv, export_ndjson, import_events, read_csv, read_ndjson
+from services.metrics import get_metrics
+from services.pagination import InvalidCursor, keyset_page, wants_cursor
+from services.user_cache import invalidate_user
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -19,6 +26,17 @@ def get_users():
     try:
         page = request.args.get('page', default=1, type=int)
         per_page = request.args.get('per_page', default=10, type=int)
+        if wants_cursor():
+            # keyset page on user.id: no total count, constant cost however deep the page is
+            try:
+                users, next_cursor = keyset_page(User.query, [User.id], per_page, request.args.get('cursor'))
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify({
+                'items': [user.to_dict() for user in users],
+                'per_page': per_page,
+                'next_cursor': next_cursor
+            })
         pagination = User.query.order_by(User.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
         users = pagination.items
         result = [user.to_dict() for user in users]
@@ -51,6 +69,7 @@ def update_user(user_id):
             user.avatar_url = data['avatar_url']
             
         db.session.commit()
+        invalidate_user(user.id)
         return jsonify(user.to_dict())
     except Exception as e:
         db.session.rollback()
@@ -71,6 +90,7 @@ def update_user_role(user_id):
             
         user.role = data['role']
         db.session.commit()
+        invalidate_user(user.id)
         
         return jsonify(user.to_dict())
     except Exception as e:
@@ -89,6 +109,7 @@ def delete_user(user_id):
             
         db.session.delete(user)
         db.session.commit()
+        invalidate_user(user_id)
         
         return '', 204
     except Exception as e:
@@ -98,12 +119,61 @@ def delete_user(user_id):
 @admin_bp.route('/api/admin/stats')
 @admin_required
 def get_stats():
+    # sales figures come from the periodically refreshed rollup, so this never scans the booking table;
+    # 'bookings' is the count taken at the last refresh (see refreshed_at)
     try:
-        stats = {
-            'users': User.query.count(),
-            'events': Event.query.count(),
-            'bookings': Booking.query.count()
-        }
+        days = min(max(request.args.get('days', default=30, type=int), 1), 366)
+        stats = sales_stats(days=days, top_events=request.args.get('top_events', default=20, type=int))
+        stats['users'] = User.query.count()
+        stats['events'] = Event.query.count()
         return jsonify(stats)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/metrics')
+def get_request_metrics():
+    # Prometheus text format; scrapers send METRICS_TOKEN as a bearer token, people use an admin session
+    token = current_app.config['METRICS_TOKEN']
+    authorization = request.headers.get('Authorization', '')
+    if not (token and hmac.compare_digest(authorization, f'Bearer {token}')):
+        if not current_user.is_authenticated or not current_user.is_admin():
+            return jsonify({'error': 'Not enough rights'}), 403
+    return Response(get_metrics().render(), mimetype='text/plain; version=0.0.4')
+
+@admin_bp.route('/api/admin/cache')
+@admin_required
+def get_cache_stats():
+    cache = get_cache()
+    stats = cache.stats.to_dict()
+    stats['backend'] = cache.name
+    stats['entries'] = len(cache)
+    return jsonify(stats)
+
+def wants_csv():
+    return request.args.get('format') == 'csv' or request.mimetype == 'text/csv'
+
+@admin_bp.route('/api/admin/events/import', methods=['POST'])
+@admin_required
+def import_events_bulk():
+    # NDJSON (one POST /api/events body per line) or CSV, read from the request stream row by row
+    lines = (line.decode('utf-8') for line in request.stream)
+    try:
+        report = import_events(read_csv(lines) if wants_csv() else read_ndjson(lines))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    if report['imported']:
+        invalidate_events(listing=True)
+    return jsonify(report)
+
+@admin_bp.route('/api/admin/events/export')
+@admin_required
+def export_events_bulk():
+    # streamed in the import format, so an export can be imported elsewhere as it is
+    if wants_csv():
+        body, mimetype, filename = export_csv(), 'text/csv', 'events.csv'
+    else:
+        body, mimetype, filename = export_ndjson(), 'application/x-ndjson', 'events.ndjson'
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
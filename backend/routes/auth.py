@@ -1,22 +1,27 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 from models.user import User
 from models import db
+from services.passwords import HashingBusy, hash_password, verify_password
+from services.user_cache import invalidate_user
 import logging
 
-# configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 auth_bp = Blueprint('auth', __name__)
 
+def hashing_busy():
+    # every password hashing slot is taken: ask the client to come back instead of queueing without bound
+    response = jsonify({'error': 'Too many login attempts right now, try again shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @auth_bp.route('/api/auth/register', methods=['POST'])
 def register():
     try:
         logger.debug('Start processing registration request')
         data = request.get_json()
-        logger.debug(f'Received data: {data}')
+        logger.debug('Received fields: %s', list(data) if data else None)
         
         if not data:
             logger.error('No data received')
@@ -38,7 +43,7 @@ def register():
             name=data['name'],
             email=data['email']
         )
-        user.set_password(data['password'])
+        user.password_hash = hash_password(data['password'])
         
         logger.debug('Adding user to database')
         db.session.add(user)
@@ -54,6 +59,8 @@ def register():
             'message': 'Registration successful'
         }), 201
 
+    except HashingBusy:
+        return hashing_busy()
     except Exception as e:
         logger.error(f'Registration error: {str(e)}', exc_info=True)
         db.session.rollback()
@@ -69,7 +76,11 @@ def login():
 
         user = User.query.filter_by(email=data['email']).first()
         
-        if user and user.check_password(data['password']):
+        if user and verify_password(user, data['password']):
+            # a hash made with older cost parameters was replaced during the check
+            if db.session.is_modified(user):
+                db.session.commit()
+                invalidate_user(user.id)
             login_user(user)
             return jsonify({
                 'user': user.to_dict(),
@@ -77,7 +88,10 @@ def login():
             })
         
         return jsonify({'error': 'errors.loginError'}), 401
+    except HashingBusy:
+        return hashing_busy()
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/api/auth/logout', methods=['POST'])
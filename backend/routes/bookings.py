@@ -1,30 +1,69 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
-from models import Booking, Event, db
+from models import Booking, Event, User, db
+from sqlalchemy import func
+from services.inventory import NotEnoughTickets, move_booking_seats, reserve_seats, run_with_retry
+from services.group_commit import get_booking_writer
+from services.booking_export import export_bookings_csv, export_bookings_ndjson
+from services.cache import invalidate_events
+from services.etags import make_etag, not_modified, with_etag
+from services.holds import hold_expiry, is_hold_expired
+from services.pagination import InvalidCursor, keyset_page, wants_cursor
+from services.pricing import UnknownCategory, get_price_book
+from services.waiting_room import get_waiting_room
 import logging
-from collections import Counter
 
 # configure logging
 logger = logging.getLogger(__name__)
 
 bookings_bp = Blueprint('bookings', __name__)
 
+def bookings_cursor_page(query, per_page):
+    # keyset page on booking.id: no total count, constant cost however deep the page is
+    try:
+        bookings, next_cursor = keyset_page(query, [Booking.id], per_page, request.args.get('cursor'))
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'items': [booking.to_dict() for booking in bookings],
+        'per_page': per_page,
+        'next_cursor': next_cursor
+    })
+
 @bookings_bp.route('/api/bookings')
 @login_required
 def get_bookings():
     # users see only their own bookings on this endpoint
     page = request.args.get('page', default=1, type=int)
     per_page = request.args.get('per_page', default=10, type=int)
+    
+    # the list only changes when one of the user's bookings or their events gets a new revision,
+    # so one aggregate query decides whether the client's copy is still current
+    count, last_id, booking_revisions, event_revisions = db.session.query(
+        func.count(Booking.id),
+        func.max(Booking.id),
+        func.coalesce(func.sum(Booking.revision), 0),
+        func.coalesce(func.sum(Event.revision), 0)
+    ).join(Event, Booking.event_id == Event.id).filter(Booking.user_id == current_user.id).one()
+    etag = make_etag('bookings', current_user.id, current_user.name, count, last_id,
+                     booking_revisions, event_revisions, page, per_page, request.args.get('cursor'))
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    
+    if wants_cursor():
+        return with_etag(bookings_cursor_page(Booking.query.filter_by(user_id=current_user.id), per_page), etag)
+    
     pagination = Booking.query.filter_by(user_id=current_user.id).order_by(Booking.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
     bookings = pagination.items
     result = [booking.to_dict() for booking in bookings]
-    return jsonify({
+    return with_etag(jsonify({
         'items': result,
         'total': pagination.total,
         'page': pagination.page,
         'per_page': pagination.per_page,
         'pages': pagination.pages
-    })
+    }), etag)
 
 @bookings_bp.route('/api/admin/bookings')
 @login_required
@@ -35,6 +74,8 @@ def get_all_bookings_for_admin():
 
     page = request.args.get('page', default=1, type=int)
     per_page = request.args.get('per_page', default=10, type=int)
+    if wants_cursor():
+        return bookings_cursor_page(Booking.query, per_page)
     pagination = Booking.query.order_by(Booking.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
     bookings = pagination.items
     result = [booking.to_dict() for booking in bookings]
@@ -46,22 +87,52 @@ def get_all_bookings_for_admin():
         'pages': pagination.pages
     })
 
+@bookings_bp.route('/api/admin/bookings/export')
+@login_required
+def export_bookings_for_admin():
+    # every booking streamed as NDJSON (default) or ?format=csv, optionally ?status=confirmed;
+    # rows are read in id-ordered batches, so memory stays flat however many bookings there are
+    if not current_user.is_admin():
+        return jsonify({'error': 'Not enough rights'}), 403
+    status = request.args.get('status')
+    if status and status not in ['pending', 'confirmed', 'cancelled']:
+        return jsonify({'error': f'Unknown status {status}'}), 400
+    if request.args.get('format') == 'csv':
+        body, mimetype, filename = export_bookings_csv(status), 'text/csv', 'bookings.csv'
+    else:
+        body, mimetype, filename = export_bookings_ndjson(status), 'application/x-ndjson', 'bookings.ndjson'
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
 @bookings_bp.route('/api/bookings/<int:booking_id>')
 @login_required
 def get_booking(booking_id):
-    booking = Booking.query.get_or_404(booking_id)
+    # versions first, so an unchanged booking is answered without loading it
+    versions = db.session.query(Booking.user_id, Booking.revision, Event.revision, User.name).join(
+        Event, Booking.event_id == Event.id
+    ).join(User, Booking.user_id == User.id).filter(Booking.id == booking_id).first()
+    if versions is None:
+        return jsonify({'error': 'Booking not found'}), 404
     
     # check access rights
-    if not current_user.is_admin() and booking.user_id != current_user.id:
+    if not current_user.is_admin() and versions[0] != current_user.id:
         return jsonify({'error': 'Not enough rights'}), 403
     
-    return jsonify(booking.to_dict())
+    etag = make_etag('booking', booking_id, *versions)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    
+    booking = Booking.query.get_or_404(booking_id)
+    return with_etag(jsonify(booking.to_dict()), etag)
 
 @bookings_bp.route('/api/bookings', methods=['POST'])
 @login_required
 def create_booking():
     data = request.get_json()
-    logger.debug(f"Received booking data: {data}")
+    logger.debug("Received booking data: %s", data)
+    claimed_token = None  # waiting room admission held by this request until the booking is committed
     
     try:
         # check if the event exists
@@ -71,63 +142,78 @@ def create_booking():
             return jsonify({'error': 'Отсутствует ID события'}), 400
             
         event = Event.query.get_or_404(event_id)
-        logger.debug(f"Found event: {event.id} - {event.title}")
+        logger.debug("Found event: %s", event.id)
+        
+        # during on-sales buyers must first be admitted through the waiting room; the admission is
+        # claimed here, so concurrent requests cannot book several times with one token
+        queue_token = request.headers.get('X-Queue-Token') or data.get('queue_token')
+        if current_app.config['WAITING_ROOM_ENABLED']:
+            waiting_room = get_waiting_room()
+            if not waiting_room.claim(queue_token, event.id, current_user.id):
+                status = waiting_room.status(queue_token) if queue_token else None
+                return jsonify({'error': 'Not admitted from the waiting room yet', 'queue': status}), 429
+            claimed_token = queue_token
         
         # check if required fields are present
-        if 'seats' not in data or 'total_price' not in data:
-            logger.error(f"Missing required fields: seats or total_price. Data: {data}")
+        if not isinstance(data.get('seats'), list) or not data['seats']:
+            logger.error("Missing required fields: seats. Data: %s", data)
             return jsonify({'error': 'Missing required fields'}), 400
         
-        # check availability of tickets by categories
-        ticket_categories = {}
-        for seat_category in data['seats']:
-            if seat_category in ticket_categories:
-                ticket_categories[seat_category] += 1
+        # the price comes from the ticket prices, never from the client; total_price is only compared
+        try:
+            quote = get_price_book().quote(event.id, data['seats'])
+        except UnknownCategory as e:
+            logger.error(str(e))
+            return jsonify({'error': str(e)}), 400
+        if 'total_price' in data and data['total_price'] != quote.total:
+            logger.info(f"Client total {data['total_price']} differs from server price {quote.total} for event {event.id}")
+        
+        def reserve():
+            # seats and the booking row are written in one short transaction
+            reserve_seats(event, data['seats'])
+            booking = Booking(
+                user_id=current_user.id,
+                event_id=event_id,
+                lines=quote.booking_lines(),
+                total_price=quote.total,
+                expires_at=hold_expiry()
+            )
+            db.session.add(booking)
+            db.session.commit()
+            return booking
+        
+        try:
+            if current_app.config['BOOKING_GROUP_COMMIT']:
+                # hand the reservation to the writer thread and wait for its batch to commit
+                booking_id = get_booking_writer().submit(
+                    current_user.id, event.id, data['seats'], quote
+                ).result()
+                booking = Booking.query.get(booking_id)
             else:
-                ticket_categories[seat_category] = 1
-        
-        logger.debug(f"Ticket categories requested: {ticket_categories}")
-        
-        # check availability of tickets by categories
-        for category, count in ticket_categories.items():
-            ticket = next((t for t in event.tickets if t.category == category), None)
-            if not ticket:
-                logger.error(f"Ticket category not found: {category}")
-                return jsonify({'error': f'Ticket category not found: {category}'}), 400
-                
-            logger.debug(f"Found ticket category {category} with capacity {ticket.capacity}")
-            
-            if ticket.capacity < count:
-                logger.warning(f"Not enough tickets for category {category}. Requested: {count}, Available: {ticket.capacity}")
-                return jsonify({'error': f'Not enough tickets for category {category}'}), 400
-        
-        # update the number of available tickets
-        for category, count in ticket_categories.items():
-            ticket = next((t for t in event.tickets if t.category == category), None)
-            ticket.capacity -= count
-            logger.debug(f"Updated ticket capacity for {category}: {ticket.capacity}")
-        
-        # create a booking
-        booking = Booking(
-            user_id=current_user.id,
-            event_id=event_id,
-            seats=data['seats'],
-            total_price=data['total_price']
-        )
-        
-        db.session.add(booking)
-        db.session.commit()
+                booking = run_with_retry(reserve)
+        except NotEnoughTickets as e:
+            db.session.rollback()
+            logger.warning(f"Sold out for event {event_id}: {str(e)}")
+            return jsonify({'error': str(e)}), 409
         logger.info(f"Booking created successfully: {booking.id}")
+        invalidate_events(event.id)
+        if claimed_token:
+            get_waiting_room().consume(claimed_token)
+            claimed_token = None
         
         # return the created booking
         result = booking.to_dict()
-        logger.debug(f"Booking result: {result}")
+        logger.debug("Booking result: %s", result)
         return jsonify(result), 201
         
     except Exception as e:
         logger.error(f"Error creating booking: {str(e)}", exc_info=True)
         db.session.rollback()
         return jsonify({'error': f'Error creating booking: {str(e)}'}), 500
+    finally:
+        # no booking was made (invalid request, sold out or an error): the admission can be used again
+        if claimed_token:
+            get_waiting_room().release(claimed_token)
 
 @bookings_bp.route('/api/bookings/<int:booking_id>', methods=['PUT'])
 @login_required
@@ -144,13 +230,24 @@ def update_booking(booking_id):
             return jsonify({'error': 'Not enough rights'}), 403
         
         data = request.get_json()
-        logger.debug(f"Received update data: {data}")
+        logger.debug("Received update data: %s", data)
+        seats_moved = False
         
         # allow users to change status to 'confirmed' or 'cancelled', admins to any
         if 'status' in data and data['status'] in ['pending', 'confirmed', 'cancelled']:
             if current_user.is_admin() or data['status'] in ['confirmed', 'cancelled']:
                 # additional check for users to only confirm or cancel their own bookings
                 if current_user.is_admin() or booking.user_id == current_user.id:
+                    if data['status'] == 'confirmed' and is_hold_expired(booking):
+                        return jsonify({'error': 'Booking hold has expired'}), 409
+                    try:
+                        move_booking_seats(booking, booking.status, data['status'])
+                    except NotEnoughTickets as e:
+                        db.session.rollback()
+                        return jsonify({'error': str(e)}), 400
+                    if booking.status != data['status']:
+                        booking.expires_at = hold_expiry() if data['status'] == 'pending' else None
+                        seats_moved = True
                     booking.status = data['status']
                     logger.debug(f"Booking {booking.id} status updated to {booking.status} by user {current_user.id}")
                 else:
@@ -159,6 +256,8 @@ def update_booking(booking_id):
                 return jsonify({'error': 'Dont have enough rights to set this status.'}), 403 
         
         db.session.commit()
+        if seats_moved:
+            invalidate_events(booking.event_id)
         
         # create a simplified response without related models
         response_data = {
@@ -171,7 +270,7 @@ def update_booking(booking_id):
             'event_title': booking.event.title if hasattr(booking, 'event') and booking.event else {'ru': 'Неизвестное событие', 'en': 'Unknown event'}
         }
         
-        logger.debug(f"Updated booking data: {response_data}")
+        logger.debug("Updated booking data: %s", response_data)
         return jsonify(response_data), 200
     except Exception as e:
         logger.error(f"Error updating booking: {str(e)}", exc_info=True)
@@ -192,19 +291,14 @@ def cancel_booking(booking_id):
         if not current_user.is_admin() and booking.user_id != current_user.id:
             return jsonify({'error': 'Not enough rights'}), 403
         
-        # return tickets to the available pool
-        event = booking.event
-        if event:
-            # count the number of tickets by categories
-            seat_counts = Counter(booking.seats)
-            for category, count in seat_counts.items():
-                ticket = next((t for t in event.tickets if t.category == category), None)
-                if ticket:
-                    ticket.capacity += count
+        # return tickets to the available pool (only once for an already cancelled booking)
+        move_booking_seats(booking, booking.status, 'cancelled')
         
         # cancel the booking (soft delete)
         booking.status = 'cancelled'
+        booking.expires_at = None
         db.session.commit()
+        invalidate_events(booking.event_id)
         
         # create a simplified response without related models
         response_data = {
@@ -215,9 +309,10 @@ def cancel_booking(booking_id):
             'created_at': booking.created_at.isoformat()
         }
         
-        logger.debug(f"Cancelled booking data: {response_data}")
+        logger.debug("Cancelled booking data: %s", response_data)
         return jsonify(response_data), 200
             
     except Exception as e:
         logger.error(f"Error cancelling booking: {str(e)}", exc_info=True)
+        db.session.rollback()
         return jsonify({'error': f'Error cancelling booking: {str(e)}'}), 500 
\ No newline at end of file
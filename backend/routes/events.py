@@ -1,63 +1,116 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from models import Event, Ticket, Booking, db
+from models import Event, EventText, Ticket, Booking, db
+from models.event_text import LANGUAGES
 from datetime import datetime
-import traceback
+from sqlalchemy.orm import defer, selectinload
+from services.cache import EVENT_LIST_TAG, cache_json, cached_response, event_tag, invalidate_events, request_cache_key
+from services.etags import bump_event_revision, event_etag, not_modified, with_etag
+from services.pagination import InvalidCursor, keyset_page, wants_cursor
+from services.pricing import get_price_book
+from services.search import apply_search
+from services.event_filters import InvalidFilter, filter_events
+from services.event_io import InvalidEvent, validate_event
+import logging
+
+logger = logging.getLogger(__name__)
 
 events_bp = Blueprint('events', __name__)
 
+def event_query(lang):
+    # with ?lang= only that language's strings are loaded, the JSON columns are never read
+    query = Event.query.options(selectinload(Event.tickets))
+    if lang:
+        query = query.options(
+            defer(Event._title), defer(Event._description), defer(Event._venue),
+            selectinload(Event.texts.and_(EventText.lang == lang))
+        )
+    return query
+
 @events_bp.route('/api/events')
 def get_events():
     try:
-        print("Received request to get events")
+        # anonymous listing pages are served from the cache until an event on them changes
+        cache_key = request_cache_key()
+        cached = cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
         # get filtering parameters
-        category = request.args.get('category')
-        date = request.args.get('date')
         page = request.args.get('page', default=1, type=int)
         per_page = request.args.get('per_page', default=8, type=int)
+        lang = request.args.get('lang')
+        if lang and lang not in LANGUAGES:
+            return jsonify({'error': f'Unsupported language {lang}'}), 400
         
-        query = Event.query
-        
-        if category:
-            query = query.filter_by(category=category)
-        if date:
-            date_obj = datetime.strptime(date, '%Y-%m-%d')
-            query = query.filter(Event.date >= date_obj, 
-                               Event.date < date_obj.replace(hour=23, minute=59, second=59))
+        # tickets (and texts for ?lang=) for the whole page are fetched in one extra query each
+        query = event_query(lang)
         
-        pagination = query.order_by(Event.date.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            query = filter_events(query, request.args)
+        except InvalidFilter as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # ?search= matches title, description and venue in both languages, best matches first
+        search = request.args.get('search', '').strip()
+        if search:
+            if wants_cursor():
+                return jsonify({'error': 'Cursor pagination is not supported with search'}), 400
+            query = apply_search(query, search)
+            if query is None:
+                return jsonify({'items': [], 'total': 0, 'page': page, 'per_page': per_page, 'pages': 0})
+        
+        if wants_cursor():
+            # keyset page on (date, id): no total count, constant cost however deep the page is
+            try:
+                events, next_cursor = keyset_page(query, [Event.date, Event.id], per_page, request.args.get('cursor'))
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
+            return cache_json(cache_key, {
+                'items': [event.to_dict(lang) for event in events],
+                'per_page': per_page,
+                'next_cursor': next_cursor
+            }, [EVENT_LIST_TAG] + [event_tag(event.id) for event in events])
+        
+        if not search:
+            query = query.order_by(Event.date.desc())
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         events = pagination.items
-        print(f"Found events: {len(events)}")
+        logger.debug('Found %d events', len(events))
         
-        result = []
-        for event in events:
-            try:
-                event_dict = event.to_dict()
-                result.append(event_dict)
-            except Exception as e:
-                print(f"Error serializing event {event.id}: {str(e)}")
-                print(traceback.format_exc())
+        result = [event.to_dict(lang) for event in events]
         
-        return jsonify({
+        return cache_json(cache_key, {
             'items': result,
             'total': pagination.total,
             'page': pagination.page,
             'per_page': pagination.per_page,
             'pages': pagination.pages
-        })
+        }, [EVENT_LIST_TAG] + [event_tag(event.id) for event in events])
     except Exception as e:
-        print("Error fetching events:", str(e))
-        print(traceback.format_exc())
+        logger.error(f"Error fetching events: {str(e)}", exc_info=True)
         return jsonify({'error': 'Error loading events'}), 500
 
 @events_bp.route('/api/events/<int:event_id>')
 def get_event(event_id):
     try:
-        event = Event.query.get_or_404(event_id)
-        return jsonify(event.to_dict())
+        # pollers that already have the current revision get a 304 without serialization
+        etag = event_etag(event_id)
+        if etag:
+            response = not_modified(etag)
+            if response is not None:
+                return response
+        cache_key = f'{request_cache_key()}#{etag}'
+        response = cached_response(cache_key)
+        if response is None:
+            lang = request.args.get('lang')
+            if lang and lang not in LANGUAGES:
+                return jsonify({'error': f'Unsupported language {lang}'}), 400
+            event = event_query(lang).filter(Event.id == event_id).first_or_404()
+            response = cache_json(cache_key, event.to_dict(lang), [event_tag(event_id)])
+        return with_etag(response, etag)
     except Exception as e:
-        print(f"Error fetching event {event_id}:", str(e))
-        print(traceback.format_exc())
+        logger.error(f"Error fetching event {event_id}: {str(e)}", exc_info=True)
         return jsonify({'error': 'Error loading event'}), 500
 
 @events_bp.route('/api/events', methods=['POST'])
@@ -67,75 +120,31 @@ def create_event():
         return jsonify({'error': 'Not enough rights'}), 403
     
     try:
-        print("Received request to create event")
         data = request.get_json()
-        print("Request data:", data)
-        
-        if not data:
-            return jsonify({'error': 'Event data is missing'}), 400
-            
-        required_fields = ['title', 'date', 'venue', 'category', 'tickets']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field {field}'}), 400
-        
-        # check the structure of multi-language fields
-        for field in ['title', 'description', 'venue']:
-            if field in data and not isinstance(data[field], dict):
-                return jsonify({'error': f'Field {field} must be an object with ru and en keys'}), 400
-            if field in data and not all(key in data[field] for key in ['ru', 'en']):
-                return jsonify({'error': f'Field {field} must contain ru and en keys'}), 400
-        
-        # check the date
+        logger.debug('Create event request: %s', data)
+        
+        # the same validation as the bulk import
         try:
-            event_date = datetime.fromisoformat(data['date'].replace('Z', '+00:00'))
-        except (ValueError, TypeError):
-            return jsonify({'error': 'Invalid date format'}), 400
-        
-        event = Event(
-            title=data['title'],
-            description=data.get('description', {'ru': '', 'en': ''}),
-            date=event_date,
-            venue=data['venue'],
-            category=data['category'],
-            image_url=data.get('image_url')
-        )
+            event_data, tickets = validate_event(data)
+        except InvalidEvent as e:
+            return jsonify({'error': str(e)}), 400
+        
+        event = Event(**event_data)
         
         # create ticket categories
-        if not isinstance(data['tickets'], list):
-            return jsonify({'error': 'Field tickets must be an array'}), 400
-            
-        for ticket_data in data['tickets']:
-            if not all(key in ticket_data for key in ['category', 'price', 'capacity']):
-                return jsonify({'error': 'Each ticket must contain category, price and capacity'}), 400
-                
-            try:
-                price = float(ticket_data['price'])
-                capacity = int(ticket_data['capacity'])
-                if price < 0 or capacity < 0:
-                    raise ValueError
-            except (ValueError, TypeError):
-                return jsonify({'error': 'Invalid price or capacity format'}), 400
-                
-            ticket = Ticket(
-                category=ticket_data['category'],
-                price=price,
-                capacity=capacity,
-                age_restriction=ticket_data.get('ageRestriction', '0+')
-            )
-            event.tickets.append(ticket)
-        
-        print("Saving event to database...")
+        for ticket_data in tickets:
+            event.tickets.append(Ticket(**ticket_data))
+        
         db.session.add(event)
         db.session.commit()
+        invalidate_events(listing=True)
         
         result = event.to_dict()
-        print("Event successfully created:", result)
+        logger.info(f"Event created: {event.id}")
         return jsonify(result), 201
         
     except Exception as e:
-        print("Error creating event:", str(e))
-        print(traceback.format_exc())
+        logger.error(f"Error creating event: {str(e)}", exc_info=True)
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -155,49 +164,56 @@ def update_event(event_id):
     event.venue = data.get('venue', event.venue)
     event.category = data.get('category', event.category)
     event.image_url = data.get('image_url', event.image_url)
+    bump_event_revision(event_id)
     
     db.session.commit()
+    invalidate_events(event_id, listing=True)
     
     return jsonify(event.to_dict())
 
 @events_bp.route('/api/events/<int:event_id>', methods=['DELETE'])
 @login_required
 def delete_event(event_id):
-    print(f"Received request to delete event {event_id}")
-    print(f"Current user: {current_user.id}, is_admin: {current_user.is_admin()}")
-    
     if not current_user.is_admin():
-        print("Access denied: user is not an administrator")
+        logger.warning(f"User {current_user.id} tried to delete event {event_id} without admin rights")
         return jsonify({'error': 'Not enough rights'}), 403
     
     try:
         event = Event.query.get_or_404(event_id)
-        print(f"Event found: {event.id}")
         
         # Check for related bookings
         bookings = Booking.query.filter_by(event_id=event_id).first()
         if bookings:
-            print(f"Found related bookings for event {event_id}")
             return jsonify({'error': 'Cannot delete event because there are related bookings'}), 400
         
-        print("Deleting event (tickets will be deleted automatically)")
+        # tickets are deleted with the event
         db.session.delete(event)
         db.session.commit()
+        invalidate_events(event_id, listing=True)
+        get_price_book().invalidate(event_id)
         
-        print("Event successfully deleted")
+        logger.info(f"Event deleted: {event_id}")
         return jsonify({'message': 'Event successfully deleted'}), 200
     except Exception as e:
         db.session.rollback()
-        print(f"Error deleting event: {str(e)}")
-        print("Full error stack:")
-        print(traceback.format_exc())
+        logger.error(f"Error deleting event: {str(e)}", exc_info=True)
         return jsonify({'error': f'Error deleting event: {str(e)}'}), 500
 
 # routes for working with event tickets
 @events_bp.route('/api/events/<int:event_id>/tickets')
 def get_event_tickets(event_id):
-    event = Event.query.get_or_404(event_id)
-    return jsonify([ticket.to_dict() for ticket in event.tickets])
+    etag = event_etag(event_id, 'tickets')
+    if etag is None:
+        return jsonify({'error': 'Event not found'}), 404
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    cache_key = f'{request_cache_key()}#{etag}'
+    response = cached_response(cache_key)
+    if response is None:
+        event = Event.query.get_or_404(event_id)
+        response = cache_json(cache_key, [ticket.to_dict() for ticket in event.tickets], [event_tag(event_id)])
+    return with_etag(response, etag)
 
 @events_bp.route('/api/events/<int:event_id>/tickets', methods=['POST'])
 @login_required
@@ -205,7 +221,7 @@ def add_event_ticket(event_id):
     if not current_user.is_admin():
         return jsonify({'error': 'Not enough rights'}), 403
     
-    event = Event.query.get_or_404(event_id)
+    Event.query.get_or_404(event_id)
     data = request.get_json()
     
     ticket = Ticket(
@@ -216,6 +232,9 @@ def add_event_ticket(event_id):
     )
     
     db.session.add(ticket)
+    bump_event_revision(event_id)
     db.session.commit()
+    invalidate_events(event_id)
+    get_price_book().invalidate(event_id)
     
     return jsonify(ticket.to_dict()), 201 
\ No newline at end of file
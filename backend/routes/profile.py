@@ -1,21 +1,16 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
 from models.user import User
 from models import db
+from services.avatars import InvalidAvatar, get_avatar_processor, save_upload
+from services.passwords import HashingBusy, hash_password, verify_password
+from services.user_cache import invalidate_user
 import logging
-import os
-from datetime import datetime
 
-# configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 profile_bp = Blueprint('profile', __name__)
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'png', 'jpg', 'jpeg', 'gif'}
-
 @profile_bp.route('/api/users/profile', methods=['PUT'])
 @login_required
 def update_profile():
@@ -52,29 +47,34 @@ def update_profile():
 
         # update password if it was provided
         if current_password and new_password:
-            if not current_user.check_password(current_password):
+            if not verify_password(current_user, current_password):
                 return jsonify({'error': 'Invalid current password'}), 400
-            current_user.set_password(new_password)
+            current_user.password_hash = hash_password(new_password)
 
-        # process avatar upload
+        # process avatar upload: the original is stored under its content hash and served at once,
+        # resized WebP variants replace it when the background pool has made them. the format is checked
+        # from the file's content by save_upload, not from the client's file name
+        uploaded = None
         if avatar and avatar.filename:
-            if not allowed_file(avatar.filename):
-                return jsonify({'error': 'Invalid file format'}), 400
-
-            # create a unique file name
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"{current_user.id}_{timestamp}_{secure_filename(avatar.filename)}"
-            
-            # save the file
-            avatar_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            avatar.save(avatar_path)
-            
-            # update the URL in the database
-            current_user.avatar_url = f'http://localhost:5000/static/avatars/{filename}'
+            try:
+                uploaded = save_upload(avatar.stream, current_app.config['UPLOAD_FOLDER'], current_app.config['AVATAR_MAX_BYTES'])
+            except InvalidAvatar as e:
+                db.session.rollback()
+                return jsonify({'error': str(e)}), 400
+            previous_url = current_user.avatar_url
+            # the frontend runs on another origin, so avatar URLs are absolute
+            base_url = current_app.config['AVATAR_BASE_URL'] or request.host_url.rstrip('/') + '/static/avatars'
+            current_user.avatar_url = f"{base_url}/{uploaded}"
 
         db.session.commit()
+        invalidate_user(current_user.id)
+        if uploaded:
+            get_avatar_processor().submit(current_user.id, uploaded, base_url, previous_url)
         return jsonify(current_user.to_dict())
 
+    except HashingBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         logger.error(f'Error updating profile: {str(e)}', exc_info=True)
         db.session.rollback()
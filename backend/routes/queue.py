@@ -0,0 +1,22 @@
+from flask import Blueprint, jsonify
+from flask_login import login_required, current_user
+from models import Event
+from services.waiting_room import get_waiting_room
+
+queue_bp = Blueprint('queue', __name__)
+
+@queue_bp.route('/api/events/<int:event_id>/queue', methods=['POST'])
+@login_required
+def join_queue(event_id):
+    # issue a queue token; the buyer polls it until admitted, then sends it with the booking
+    Event.query.get_or_404(event_id)
+    status = get_waiting_room().join(event_id, current_user.id)
+    return jsonify(status), 201
+
+@queue_bp.route('/api/queue/<token>')
+@login_required
+def get_queue_status(token):
+    status = get_waiting_room().status(token)
+    if status is None:
+        return jsonify({'error': 'Queue token not found or expired'}), 404
+    return jsonify(status)
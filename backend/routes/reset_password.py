@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from models.user import User
 from models import db
+from services.passwords import HashingBusy, hash_password
+from services.user_cache import invalidate_user
 
 reset_password_bp = Blueprint('reset_password', __name__)
 
@@ -27,6 +29,10 @@ def reset_password():
     if not user:
         return jsonify({'error': 'User not found'}), 404
 
-    user.set_password(password)
+    try:
+        user.password_hash = hash_password(password)
+    except HashingBusy as e:
+        return jsonify({'error': str(e)}), 503
     db.session.commit()
+    invalidate_user(user.id)
     return jsonify({'message': 'Password has been reset'}), 200 
\ No newline at end of file
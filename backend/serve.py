@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+import sys
+from dotenv import load_dotenv
+
+# production server: python serve.py
+# SERVER_WORKERS processes of SERVER_THREADS threads each behind gunicorn (waitress with threads only on Windows).
+# each worker imports the app itself, so caches, pools and background threads start per process after the fork
+
+load_dotenv()
+os.environ.setdefault('LOG_MODE', 'production')
+
+BIND = os.getenv('SERVER_BIND', '0.0.0.0:5000')
+# with SQLite every write takes the same lock, so more processes mainly add read and CPU capacity
+WORKERS = int(os.getenv('SERVER_WORKERS', str(min(4, multiprocessing.cpu_count()))))
+THREADS = int(os.getenv('SERVER_THREADS', '8'))
+TIMEOUT = int(os.getenv('SERVER_TIMEOUT', '30'))
+# workers are replaced after this many requests (with jitter), 0 keeps them forever
+MAX_REQUESTS = int(os.getenv('SERVER_MAX_REQUESTS', '10000'))
+
+
+def serve_gunicorn():
+    from gunicorn.app.base import BaseApplication
+
+    class TicketArenaServer(BaseApplication):
+        def load_config(self):
+            settings = {
+                'bind': BIND,
+                'workers': WORKERS,
+                'threads': THREADS,
+                'worker_class': 'gthread',
+                'timeout': TIMEOUT,
+                'graceful_timeout': TIMEOUT,
+                'keepalive': 5,
+                'max_requests': MAX_REQUESTS,
+                'max_requests_jitter': MAX_REQUESTS // 10,
+                'preload_app': False,
+            }
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app import app
+            return app
+
+    TicketArenaServer().run()
+
+
+def serve_waitress():
+    from waitress import serve
+    from app import app
+    if WORKERS > 1:
+        print(f'waitress runs one process, SERVER_WORKERS={WORKERS} is ignored')
+    serve(app, listen=BIND, threads=THREADS)
+
+
+def check_single_process_features():
+    # the waiting room keeps its queues and admissions in process memory: with several workers a token issued
+    # by one is unknown to the others, and buyers would be turned away depending on which worker answers
+    if WORKERS > 1 and sys.platform != 'win32' and os.getenv('WAITING_ROOM_ENABLED', 'false').lower() in ('1', 'true', 'yes'):
+        print(f'WAITING_ROOM_ENABLED needs a single worker process: set SERVER_WORKERS=1 '
+              f'(and raise SERVER_THREADS) instead of {WORKERS}')
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    check_single_process_features()
+    print(f'Serving on {BIND}: {WORKERS} workers x {THREADS} threads')
+    if sys.platform == 'win32':
+        serve_waitress()
+    else:
+        serve_gunicorn()
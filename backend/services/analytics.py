@@ -0,0 +1,185 @@
+from datetime import date, datetime, timedelta
+import json
+import logging
+import threading
+import time
+from sqlalchemy import and_, bindparam, delete, func, select
+from models import Booking, BookingLine, Event, RollupRefresh, SalesRollup, Ticket, TicketInventory, db
+from services.inventory import run_with_retry
+
+logger = logging.getLogger(__name__)
+
+SALES_ROLLUP = 'sales'
+
+
+def _aggregate_sales():
+    # {(day, ticket_id): (event_id, category, tickets_sold, revenue, bookings)} from confirmed booking lines
+    day = func.date(Booking.created_at)
+    sales = select(
+        day,
+        BookingLine.ticket_id,
+        Ticket.event_id,
+        Ticket.category,
+        func.sum(BookingLine.quantity),
+        func.sum(BookingLine.quantity * BookingLine.unit_price),
+        func.count()
+    ).select_from(Booking).join(
+        BookingLine, BookingLine.booking_id == Booking.id
+    ).join(
+        Ticket, BookingLine.ticket_id == Ticket.id
+    ).where(Booking.status == 'confirmed').group_by(day, BookingLine.ticket_id, Ticket.event_id, Ticket.category)
+    return {(row[0], row[1]): tuple(row[2:]) for row in db.session.execute(sales)}
+
+
+def _current_rollup():
+    rollup = select(
+        func.date(SalesRollup.day), SalesRollup.ticket_id, SalesRollup.event_id, SalesRollup.category,
+        SalesRollup.tickets_sold, SalesRollup.revenue, SalesRollup.bookings
+    )
+    return {(row[0], row[1]): tuple(row[2:]) for row in db.session.execute(rollup)}
+
+
+def refresh_sales_rollup():
+    # the aggregation over every booking runs as a plain read, which on SQLite in WAL mode never blocks
+    # bookings; only the rollup rows that differ from it are then written, in a short transaction.
+    # readers keep seeing the previous rollup until that commit. Returns the refresh row
+    started = time.perf_counter()
+    fresh = _aggregate_sales()
+    current = _current_rollup()
+    bookings = db.session.query(func.count(Booking.id)).scalar()
+    db.session.commit()  # end the read transaction before taking the write lock
+
+    stale = [{'key_day': date.fromisoformat(day), 'key_ticket': ticket_id}
+             for day, ticket_id in current.keys() - fresh.keys()]
+    changed = [(key, values) for key, values in fresh.items() if current.get(key) != values]
+    # changed rows are deleted and inserted again, which covers new and updated ones alike
+    stale += [{'key_day': date.fromisoformat(day), 'key_ticket': ticket_id} for (day, ticket_id), _ in changed]
+    rows = [{
+        'day': date.fromisoformat(day),
+        'ticket_id': ticket_id,
+        'event_id': event_id,
+        'category': category,
+        'tickets_sold': tickets_sold,
+        'revenue': revenue,
+        'bookings': count
+    } for (day, ticket_id), (event_id, category, tickets_sold, revenue, count) in changed]
+
+    def write():
+        if stale:
+            table = SalesRollup.__table__
+            db.session.execute(delete(table).where(and_(
+                table.c.day == bindparam('key_day'), table.c.ticket_id == bindparam('key_ticket')
+            )), stale)
+        if rows:
+            db.session.execute(SalesRollup.__table__.insert(), rows)
+        state = RollupRefresh.query.get(SALES_ROLLUP) or RollupRefresh(name=SALES_ROLLUP)
+        state.refreshed_at = datetime.utcnow()
+        state.seconds = round(time.perf_counter() - started, 3)
+        state.bookings = bookings
+        db.session.add(state)
+        db.session.commit()
+        return state
+
+    state = run_with_retry(write)
+    logger.info(f"Sales rollup refreshed in {state.seconds}s ({len(rows)} rows written, "
+                f"{len(stale) - len(rows)} removed)")
+    return state
+
+
+def refresh_if_stale(max_age):
+    # several processes may run the refresher; only the first one past max_age rebuilds
+    state = RollupRefresh.query.get(SALES_ROLLUP)
+    if state is not None and state.refreshed_at > datetime.utcnow() - timedelta(seconds=max_age):
+        return None
+    return refresh_sales_rollup()
+
+
+def sales_stats(days=30, top_events=20):
+    # dashboard figures; everything but the sell-through (live ticket_inventory counters) comes from the rollup
+    revenue = func.sum(SalesRollup.revenue)
+    sold = func.sum(SalesRollup.tickets_sold)
+    state = RollupRefresh.query.get(SALES_ROLLUP)
+
+    total_revenue, total_sold = db.session.query(revenue, sold).one()
+
+    by_event = db.session.query(SalesRollup.event_id, revenue, sold).group_by(
+        SalesRollup.event_id
+    ).order_by(revenue.desc()).limit(top_events).all()
+    event_ids = [event_id for event_id, _, _ in by_event]
+    titles = dict(db.session.query(Event.id, Event._title).filter(Event.id.in_(event_ids))) if event_ids else {}
+    inventory = {
+        event_id: (inventory_sold or 0, total or 0)
+        for event_id, inventory_sold, total in db.session.query(
+            Ticket.event_id,
+            func.sum(TicketInventory.sold),
+            func.sum(TicketInventory.sold + TicketInventory.held + TicketInventory.available)
+        ).join(TicketInventory, TicketInventory.ticket_id == Ticket.id).filter(
+            Ticket.event_id.in_(event_ids)
+        ).group_by(Ticket.event_id)
+    } if event_ids else {}
+
+    by_category = db.session.query(SalesRollup.category, revenue, sold).group_by(
+        SalesRollup.category
+    ).order_by(revenue.desc()).all()
+
+    since = date.today() - timedelta(days=days - 1)
+    by_day = db.session.query(SalesRollup.day, revenue, sold).filter(
+        SalesRollup.day >= since
+    ).group_by(SalesRollup.day).order_by(SalesRollup.day).all()
+
+    def sell_through(event_id):
+        inventory_sold, total = inventory.get(event_id, (0, 0))
+        return round(inventory_sold / total, 4) if total else None
+
+    return {
+        'refreshed_at': state.refreshed_at.isoformat() if state else None,
+        'refresh_seconds': state.seconds if state else None,
+        'bookings': state.bookings if state else 0,
+        'revenue': round(total_revenue or 0, 2),
+        'tickets_sold': total_sold or 0,
+        'by_event': [{
+            'event_id': event_id,
+            'title': json.loads(titles[event_id]) if event_id in titles else None,
+            'revenue': round(event_revenue, 2),
+            'tickets_sold': event_sold,
+            'sell_through': sell_through(event_id)
+        } for event_id, event_revenue, event_sold in by_event],
+        'by_category': [{
+            'category': category,
+            'revenue': round(category_revenue, 2),
+            'tickets_sold': category_sold
+        } for category, category_revenue, category_sold in by_category],
+        'by_day': [{
+            'day': day.isoformat(),
+            'revenue': round(day_revenue, 2),
+            'tickets_sold': day_sold
+        } for day, day_revenue, day_sold in by_day]
+    }
+
+
+def _refresh_forever(app, interval):
+    while True:
+        with app.app_context():
+            try:
+                refresh_if_stale(interval)
+            except Exception as e:
+                logger.error(f"Sales rollup refresh failed: {str(e)}", exc_info=True)
+                db.session.rollback()
+            finally:
+                db.session.remove()
+        time.sleep(interval)
+
+
+_refresher_lock = threading.Lock()
+
+
+def start_stats_refresher(app):
+    # started once per process; STATS_REFRESH_INTERVAL=0 leaves refreshing to refresh_stats.py (cron)
+    interval = app.config['STATS_REFRESH_INTERVAL']
+    if interval <= 0 or 'stats_refresher' in app.extensions:
+        return
+    with _refresher_lock:
+        if 'stats_refresher' not in app.extensions:
+            thread = threading.Thread(target=_refresh_forever, args=(app, interval), name='stats-refresher', daemon=True)
+            app.extensions['stats_refresher'] = thread
+            thread.start()
@@ -0,0 +1,183 @@
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import hashlib
+import logging
+import os
+import re
+import secrets
+import threading
+from flask import current_app, request
+from PIL import Image, ImageOps
+from sqlalchemy import update
+from werkzeug.utils import secure_filename
+from models import User, db
+from services.user_cache import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+# uploads are copied to disk in chunks of this size while their hash is computed
+CHUNK_SIZE = 64 * 1024
+# Pillow formats accepted as avatars, with the extension the original is stored under
+FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+# files named after their content: "<hash>.<ext>" for the original, "<hash>-<size>.webp" for variants
+HASHED_NAME = re.compile(r'^([0-9a-f]{16})(-\d+)?\.[a-z]+$')
+
+
+class InvalidAvatar(ValueError):
+    pass
+
+
+def avatar_hash(url):
+    # content hash of an avatar URL made by this module, None for anything else
+    match = HASHED_NAME.match((url or '').rsplit('/', 1)[-1])
+    return match.group(1) if match else None
+
+
+def save_upload(stream, folder, max_bytes):
+    # copy the upload into a temporary file under folder, hashing it on the way; an upload that turns out
+    # too large is abandoned at max_bytes instead of being written out in full
+    os.makedirs(folder, exist_ok=True)
+    temp_path = os.path.join(folder, f'.upload-{secrets.token_hex(8)}')
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, 'wb') as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise InvalidAvatar(f'Avatar is larger than {max_bytes / (1024 * 1024):g} MB')
+                digest.update(chunk)
+                out.write(chunk)
+
+        # only the header is read here; decoding and resizing happen in the background
+        try:
+            with Image.open(temp_path) as image:
+                image_format = image.format
+        except Exception:
+            raise InvalidAvatar('File is not an image')
+        if image_format not in FORMATS:
+            raise InvalidAvatar('Invalid file format')
+
+        name = f'{digest.hexdigest()[:16]}.{FORMATS[image_format]}'
+        os.replace(temp_path, os.path.join(folder, name))
+        return name
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def make_variants(folder, name, sizes, quality):
+    # square WebP thumbnails of the original; each is written to a temporary name and renamed,
+    # so a half-written file is never served
+    content_hash = name.split('.', 1)[0]
+    variants = {}
+    with Image.open(os.path.join(folder, name)) as image:
+        # lets the JPEG decoder scale down while decoding, a large part of the cost for camera photos
+        image.draft('RGB', (max(sizes), max(sizes)))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        for size in sizes:
+            variant = f'{content_hash}-{size}.webp'
+            path = os.path.join(folder, variant)
+            if not os.path.exists(path):
+                temp_path = f'{path}.{secrets.token_hex(4)}.tmp'
+                ImageOps.fit(image, (size, size), Image.LANCZOS).save(temp_path, 'WEBP', quality=quality, method=4)
+                os.replace(temp_path, path)
+            variants[size] = variant
+    return variants
+
+
+def remove_unused(folder, url, base_url):
+    # delete the files behind an avatar URL once no user points at them: every file of a content hash
+    # (equal uploads share them), or the single file of an avatar saved before content hashing
+    if not url or not (url.startswith(base_url + '/') or '/static/avatars/' in url):
+        return 0
+    filename = url.rsplit('/', 1)[-1]
+    content_hash = avatar_hash(url)
+    if not filename or filename != secure_filename(filename):
+        return 0
+    if User.query.filter(User.avatar_url.like(f'%/{content_hash or filename}%')).first():
+        return 0
+    if content_hash:
+        paths = glob.glob(os.path.join(folder, f'{content_hash}*'))
+    else:
+        paths = [path for path in [os.path.join(folder, filename)] if os.path.exists(path)]
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return len(paths)
+
+
+class AvatarProcessor:
+    # background pool that turns uploaded originals into resized variants. the request sets avatar_url to the
+    # original and returns at once; when the variants are ready, avatar_url moves to the default size unless
+    # another upload has replaced it meanwhile, and files no user points at any more are deleted
+    def __init__(self, app, workers=2):
+        self.app = app
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='avatar')
+
+    def submit(self, user_id, name, base_url, previous_url):
+        return self._pool.submit(self._process, user_id, name, base_url, previous_url)
+
+    def _process(self, user_id, name, base_url, previous_url):
+        config = self.app.config
+        folder = config['UPLOAD_FOLDER']
+        with self.app.app_context():
+            try:
+                variants = make_variants(folder, name, config['AVATAR_SIZES'], config['AVATAR_WEBP_QUALITY'])
+                result = db.session.execute(
+                    update(User)
+                    .where(User.id == user_id, User.avatar_url == f'{base_url}/{name}')
+                    .values(avatar_url=f'{base_url}/{variants[config["AVATAR_SIZES"][0]]}')
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+                if result.rowcount:
+                    invalidate_user(user_id)
+                    logger.info(f"Avatar variants ready for user {user_id}")
+                else:
+                    # superseded by a newer upload while being processed
+                    remove_unused(folder, f'{base_url}/{name}', base_url)
+            except Exception as e:
+                logger.error(f"Avatar processing failed for user {user_id}: {str(e)}", exc_info=True)
+                db.session.rollback()
+            finally:
+                try:
+                    remove_unused(folder, previous_url, base_url)
+                except Exception as e:
+                    logger.error(f"Avatar cleanup failed: {str(e)}")
+                db.session.remove()
+
+    def close(self):
+        self._pool.shutdown()
+
+
+_processor_lock = threading.Lock()
+
+
+def get_avatar_processor():
+    # the pool is started on first use in each process
+    app = current_app._get_current_object()
+    with _processor_lock:
+        processor = app.extensions.get('avatar_processor')
+        if processor is None:
+            processor = app.extensions['avatar_processor'] = AvatarProcessor(app, workers=app.config['AVATAR_WORKERS'])
+        return processor
+
+
+def cache_avatar_files(response):
+    # content-hashed avatars never change under the same name, so browsers and proxies may keep them for a year
+    if request.endpoint == 'static' and response.status_code in (200, 304) and request.path.startswith('/static/avatars/'):
+        if HASHED_NAME.match(request.path.rsplit('/', 1)[-1]):
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+def init_avatars(app):
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    app.after_request(cache_avatar_files)
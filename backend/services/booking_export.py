@@ -0,0 +1,91 @@
+from collections import Counter
+import json
+from sqlalchemy import String, cast, func, select
+from models import Booking, BookingLine, Event, Ticket, User, db
+from models.event_text import LANGUAGES
+from services.event_io import csv_lines
+from services.inventory import decode_seats
+
+# bookings read per query; every batch is its own short read, so the export never holds a
+# long-running read transaction (on SQLite that would block writers for the whole download)
+EXPORT_BATCH = 5000
+
+CSV_COLUMNS = (['id', 'created_at', 'status', 'total_price', 'seats', 'user_id', 'user_name', 'user_email', 'event_id']
+               + [f'event_title_{lang}' for lang in LANGUAGES] + ['event_date', 'expires_at'])
+
+
+def _seat_counts(line_seats, legacy_seats):
+    # "VIP:2;standard:1" from booking_line, or the JSON list of bookings that predate it
+    if line_seats:
+        counts = {}
+        for part in line_seats.split(';'):
+            category, _, quantity = part.rpartition(':')
+            counts[category] = counts.get(category, 0) + int(quantity)
+        return counts
+    return dict(Counter(decode_seats(legacy_seats)))
+
+
+def iter_export_bookings(status=None, batch_size=EXPORT_BATCH):
+    # one query per batch with the user and event columns joined in and the seats aggregated in SQL,
+    # read as plain rows: no Booking objects, no lazy loads, memory bounded by the batch size
+    seats = select(func.group_concat(Ticket.category + ':' + cast(BookingLine.quantity, String), ';')).join(
+        Ticket, BookingLine.ticket_id == Ticket.id
+    ).where(BookingLine.booking_id == Booking.id).scalar_subquery()
+    query = db.session.query(
+        Booking.id, Booking.created_at, Booking.status, Booking.total_price, seats, Booking._seats,
+        Booking.user_id, User.name, User.email, Booking.event_id, Event._title, Event.date, Booking.expires_at
+    ).outerjoin(User, Booking.user_id == User.id).outerjoin(Event, Booking.event_id == Event.id)
+    if status:
+        query = query.filter(Booking.status == status)
+
+    last_id = 0
+    while True:
+        rows = query.filter(Booking.id > last_id).order_by(Booking.id).limit(batch_size).all()
+        if not rows:
+            return
+        for (booking_id, created_at, booking_status, total_price, line_seats, legacy_seats,
+             user_id, user_name, user_email, event_id, event_title, event_date, expires_at) in rows:
+            yield {
+                'id': booking_id,
+                'created_at': created_at.isoformat() if created_at else None,
+                'status': booking_status,
+                'total_price': total_price,
+                'seats': _seat_counts(line_seats, legacy_seats),
+                'user_id': user_id,
+                'user_name': user_name,
+                'user_email': user_email,
+                'event_id': event_id,
+                'event_title': json.loads(event_title) if event_title else None,
+                'event_date': event_date.isoformat() if event_date else None,
+                'expires_at': expires_at.isoformat() if expires_at else None
+            }
+        last_id = rows[-1][0]
+        # end the read transaction between batches
+        db.session.commit()
+
+
+def _chunks(lines, size=EXPORT_BATCH):
+    # join lines into larger chunks so a 10M-row response is not 10M tiny writes
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def export_bookings_ndjson(status=None, batch_size=EXPORT_BATCH):
+    return _chunks((json.dumps(booking, ensure_ascii=False) + '\n' for booking in iter_export_bookings(status, batch_size)), batch_size)
+
+
+def export_bookings_csv(status=None, batch_size=EXPORT_BATCH):
+    return _chunks(csv_lines(CSV_COLUMNS, (
+        [booking['id'], booking['created_at'], booking['status'], booking['total_price'],
+         ';'.join(f'{category}:{count}' for category, count in booking['seats'].items()),
+         booking['user_id'], booking['user_name'], booking['user_email'], booking['event_id']]
+        + [(booking['event_title'] or {}).get(lang, '') for lang in LANGUAGES]
+        + [booking['event_date'], booking['expires_at']]
+        for booking in iter_export_bookings(status, batch_size)
+    )), batch_size)
@@ -0,0 +1,209 @@
+from collections import OrderedDict
+import threading
+import time
+from urllib.parse import urlencode
+from flask import current_app, json, request, Response
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def to_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class NullCache:
+    # cache switched off: every lookup is a miss
+    name = 'none'
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    def get(self, key):
+        self.stats.misses += 1
+        return None
+
+    def set(self, key, value, tags=()):
+        pass
+
+    def invalidate(self, tags):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class MemoryCache:
+    # in-process LRU with a TTL; entries carry tags so writes can drop exactly what they affect
+    name = 'memory'
+
+    def __init__(self, max_entries=1024, ttl=30, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, tags, expires_at), least recently used first
+        self._tags = {}  # tag -> set of keys
+
+    def _drop(self, key):
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= self.clock():
+                if entry is not None:
+                    self._drop(key)
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[0]
+
+    def set(self, key, value, tags=()):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, tuple(tags), self.clock() + self.ttl)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._drop(key)
+                    self.stats.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCache:
+    # shared cache for multi-process deployments; any Redis-compatible server works.
+    # tags are Redis sets of keys, so invalidation reaches every worker
+    name = 'redis'
+
+    def __init__(self, url, ttl=30, prefix='ticketarena:cache:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND=redis requires the redis package (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = CacheStats()
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return value.decode('utf-8')
+
+    def set(self, key, value, tags=()):
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, value, ex=self.ttl)
+        for tag in tags:
+            pipe.sadd(self.prefix + 'tag:' + tag, key)
+            pipe.expire(self.prefix + 'tag:' + tag, self.ttl)
+        pipe.execute()
+
+    def invalidate(self, tags):
+        for tag in tags:
+            tag_key = self.prefix + 'tag:' + tag
+            keys = self.client.smembers(tag_key)
+            pipe = self.client.pipeline()
+            for key in keys:
+                pipe.delete(self.prefix + key.decode('utf-8'))
+            pipe.delete(tag_key)
+            pipe.execute()
+            self.stats.invalidations += len(keys)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+    def __len__(self):
+        return sum(1 for key in self.client.scan_iter(self.prefix + '*') if b':tag:' not in key)
+
+
+def init_cache(app):
+    backend = app.config['CACHE_BACKEND']
+    if backend == 'memory':
+        cache = MemoryCache(max_entries=app.config['CACHE_MAX_ENTRIES'], ttl=app.config['CACHE_TTL'])
+    elif backend == 'redis':
+        cache = RedisCache(app.config['CACHE_REDIS_URL'], ttl=app.config['CACHE_TTL'])
+    else:
+        cache = NullCache()
+    app.extensions['cache'] = cache
+    return cache
+
+
+def get_cache():
+    return current_app.extensions['cache']
+
+
+# tags used by the public event endpoints
+EVENT_LIST_TAG = 'events:list'
+
+
+def event_tag(event_id):
+    return f'event:{event_id}'
+
+
+def request_cache_key():
+    # route plus sorted query parameters, so ?a=1&b=2 and ?b=2&a=1 share an entry
+    return f'{request.path}?{urlencode(sorted(request.args.items(multi=True)))}'
+
+
+def cached_response(key):
+    body = get_cache().get(key)
+    if body is None:
+        return None
+    response = Response(body, mimetype='application/json')
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+
+def cache_json(key, payload, tags):
+    # serialize once, store the body and return it as the response
+    body = json.dumps(payload)
+    get_cache().set(key, body, tags)
+    response = Response(body, mimetype='application/json')
+    response.headers['X-Cache'] = 'MISS'
+    return response
+
+
+def invalidate_events(*event_ids, listing=False):
+    tags = [event_tag(event_id) for event_id in event_ids]
+    if listing:
+        tags.append(EVENT_LIST_TAG)
+    get_cache().invalidate(tags)
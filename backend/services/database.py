@@ -0,0 +1,86 @@
+import logging
+import sqlite3
+import threading
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool, StaticPool
+
+logger = logging.getLogger(__name__)
+
+
+def is_sqlite(uri):
+    return uri.startswith('sqlite')
+
+
+def is_memory_sqlite(uri):
+    return uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri
+
+
+def engine_options(uri, pool_size=10, max_overflow=10, pool_timeout=30, pool_recycle=1800, busy_timeout=5000):
+    # SQLALCHEMY_ENGINE_OPTIONS for the configured database. pool_size should cover the request threads of
+    # one worker process plus its background threads, so a request never waits for a connection;
+    # max_overflow absorbs short bursts beyond that
+    if is_memory_sqlite(uri):
+        # one connection shared by all threads, otherwise every connection sees its own empty database
+        return {'poolclass': StaticPool, 'connect_args': {'check_same_thread': False}}
+    if is_sqlite(uri):
+        # SQLite connections are cheap but not free (schema parsing, pragmas); keep them open and share
+        # them between threads. timeout is the busy timeout of the driver, in seconds
+        return {
+            'poolclass': QueuePool,
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'pool_timeout': pool_timeout,
+            'connect_args': {'check_same_thread': False, 'timeout': busy_timeout / 1000},
+        }
+    # server databases: connections dropped by the server or a proxy are detected before use
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': True,
+    }
+
+
+_pragmas = {}
+_pragmas_lock = threading.Lock()
+_listening = False
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in _pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def configure_database(app):
+    # engine options and per-connection SQLite settings; runs before init_models creates the engine.
+    # WAL lets readers go on while a booking commits, and busy_timeout makes a writer wait for the lock
+    # instead of failing at once. synchronous=NORMAL is durable in WAL mode except for the last
+    # transactions on power loss, and saves an fsync per commit
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        uri,
+        pool_size=app.config['DB_POOL_SIZE'],
+        max_overflow=app.config['DB_MAX_OVERFLOW'],
+        pool_timeout=app.config['DB_POOL_TIMEOUT'],
+        pool_recycle=app.config['DB_POOL_RECYCLE'],
+        busy_timeout=app.config['SQLITE_BUSY_TIMEOUT']
+    )
+    if not is_sqlite(uri):
+        return
+    _pragmas['busy_timeout'] = app.config['SQLITE_BUSY_TIMEOUT']
+    if not is_memory_sqlite(uri) and app.config['SQLITE_WAL']:
+        _pragmas['journal_mode'] = 'WAL'
+        _pragmas['synchronous'] = 'NORMAL'
+    global _listening
+    with _pragmas_lock:
+        if not _listening:
+            event.listen(Engine, 'connect', _set_sqlite_pragmas)
+            _listening = True
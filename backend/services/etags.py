@@ -0,0 +1,44 @@
+import hashlib
+from flask import request, make_response
+from sqlalchemy import update
+from models import Event, db
+
+
+def bump_event_revision(*event_ids):
+    # version counter behind the event ETags; incremented in SQL so concurrent writers never lose a bump
+    if not event_ids:
+        return
+    db.session.execute(
+        update(Event)
+        .where(Event.id.in_(event_ids))
+        .values(revision=Event.revision + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def make_etag(*parts):
+    # opaque ETag from the version numbers a response is rendered from
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:20]
+
+
+def event_etag(event_id, prefix='event'):
+    # ETag for anything rendered from one event (details, tickets); None if the event does not exist
+    revision = db.session.query(Event.revision).filter_by(id=event_id).scalar()
+    if revision is None:
+        return None
+    return f'{prefix}-{event_id}-r{revision}'
+
+
+def not_modified(etag):
+    # 304 for a matching If-None-Match, built before any serialization happens
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def with_etag(response, etag):
+    response = make_response(response)
+    response.set_etag(etag)
+    return response
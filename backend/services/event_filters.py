@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from models import Event, Ticket, TicketInventory
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise InvalidFilter('Dates must be in YYYY-MM-DD format')
+
+
+def parse_price(name, value):
+    try:
+        price = float(value)
+    except ValueError:
+        raise InvalidFilter(f'{name} must be a number')
+    if price < 0:
+        raise InvalidFilter(f'{name} must not be negative')
+    return price
+
+
+def filter_events(query, args):
+    # GET /api/events filters, all applied in SQL so the requested page is already the filtered one:
+    #   category=a,b (or repeated)     one of several categories
+    #   date=YYYY-MM-DD                a single day
+    #   date_from / date_to            inclusive date range
+    #   min_price / max_price          at least one ticket category in the price range
+    #   available_only=true            at least one ticket category with seats left
+    # price and availability must hold for the same ticket, so "under 50 with seats left" means a
+    # ticket that is both; raises InvalidFilter for malformed values
+    categories = [category for value in args.getlist('category') for category in value.split(',') if category]
+    if len(categories) == 1:
+        query = query.filter(Event.category == categories[0])
+    elif categories:
+        query = query.filter(Event.category.in_(categories))
+
+    if args.get('date'):
+        day = parse_date(args['date'])
+        query = query.filter(Event.date >= day, Event.date < day + timedelta(days=1))
+    if args.get('date_from'):
+        query = query.filter(Event.date >= parse_date(args['date_from']))
+    if args.get('date_to'):
+        query = query.filter(Event.date < parse_date(args['date_to']) + timedelta(days=1))
+
+    ticket_conditions = []
+    if args.get('min_price'):
+        ticket_conditions.append(Ticket.price >= parse_price('min_price', args['min_price']))
+    if args.get('max_price'):
+        ticket_conditions.append(Ticket.price <= parse_price('max_price', args['max_price']))
+    if args.get('available_only', '').lower() in ('1', 'true', 'yes'):
+        # tickets without an inventory row (created before the table) count their capacity
+        ticket_conditions.append(func.coalesce(TicketInventory.available, Ticket.capacity) > 0)
+    if ticket_conditions:
+        # correlated on ticket.event_id, answered from the (event_id, price) index per event
+        tickets = select(Ticket.id).outerjoin(TicketInventory, TicketInventory.ticket_id == Ticket.id).where(
+            Ticket.event_id == Event.id, *ticket_conditions
+        )
+        query = query.filter(tickets.exists())
+    return query
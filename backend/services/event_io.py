@@ -0,0 +1,266 @@
+import csv
+from datetime import datetime
+import json
+import time
+from sqlalchemy.orm import selectinload
+from models import Event, EventText, Ticket, TicketInventory, db
+from models.event_text import LANGUAGES
+from services.inventory import run_with_retry
+
+# events written per transaction by the bulk import, and read per query by the export
+IMPORT_BATCH = 500
+EXPORT_BATCH = 1000
+
+# row errors listed in an import report; the failed count includes the rest
+MAX_REPORTED_ERRORS = 1000
+
+TEXT_FIELDS = ('title', 'description', 'venue')
+CSV_COLUMNS = [f'{field}_{lang}' for field in TEXT_FIELDS for lang in LANGUAGES] + ['date', 'category', 'image_url', 'tickets']
+
+
+class InvalidEvent(ValueError):
+    pass
+
+
+def validate_event(data):
+    # the rules of POST /api/events; returns the event's column values and its tickets, or raises InvalidEvent
+    if not data:
+        raise InvalidEvent('Event data is missing')
+    if not isinstance(data, dict):
+        raise InvalidEvent('Event must be an object')
+
+    for field in ['title', 'date', 'venue', 'category', 'tickets']:
+        if field not in data:
+            raise InvalidEvent(f'Missing required field {field}')
+
+    # check the structure of multi-language fields
+    for field in TEXT_FIELDS:
+        if field in data and not isinstance(data[field], dict):
+            raise InvalidEvent(f'Field {field} must be an object with ru and en keys')
+        if field in data and not all(key in data[field] for key in ['ru', 'en']):
+            raise InvalidEvent(f'Field {field} must contain ru and en keys')
+
+    try:
+        event_date = datetime.fromisoformat(data['date'].replace('Z', '+00:00'))
+    except (ValueError, TypeError, AttributeError):
+        raise InvalidEvent('Invalid date format')
+
+    if not isinstance(data['tickets'], list):
+        raise InvalidEvent('Field tickets must be an array')
+    tickets = []
+    for ticket_data in data['tickets']:
+        if not isinstance(ticket_data, dict) or not all(key in ticket_data for key in ['category', 'price', 'capacity']):
+            raise InvalidEvent('Each ticket must contain category, price and capacity')
+        try:
+            price = float(ticket_data['price'])
+            capacity = int(ticket_data['capacity'])
+            if price < 0 or capacity < 0:
+                raise ValueError
+        except (ValueError, TypeError):
+            raise InvalidEvent('Invalid price or capacity format')
+        tickets.append({
+            'category': ticket_data['category'],
+            'price': price,
+            'capacity': capacity,
+            'age_restriction': ticket_data.get('ageRestriction', '0+')
+        })
+
+    return {
+        'title': data['title'],
+        'description': data.get('description', {'ru': '', 'en': ''}),
+        'date': event_date,
+        'venue': data['venue'],
+        'category': data['category'],
+        'image_url': data.get('image_url')
+    }, tickets
+
+
+# reading import files; each reader yields (row number, event data, parse error)
+
+def read_ndjson(lines):
+    # one POST /api/events body per line
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line), None
+        except ValueError:
+            yield number, None, 'Invalid JSON'
+
+
+def parse_csv_tickets(value):
+    # "VIP:100:50:18+;standard:20:500" -> category:price:capacity[:age restriction] per ticket
+    tickets = []
+    for part in (value or '').split(';'):
+        if not part.strip():
+            continue
+        fields = part.strip().split(':')
+        if len(fields) < 3:
+            raise InvalidEvent('Each ticket must contain category, price and capacity')
+        ticket = {'category': fields[0], 'price': fields[1], 'capacity': fields[2]}
+        if len(fields) > 3:
+            ticket['ageRestriction'] = fields[3]
+        tickets.append(ticket)
+    return tickets
+
+
+def read_csv(lines):
+    # CSV_COLUMNS with a header row; row numbers count data rows
+    for number, row in enumerate(csv.DictReader(lines), 1):
+        data = {key: row[key] for key in ('date', 'category', 'image_url') if row.get(key)}
+        for field in TEXT_FIELDS:
+            data[field] = {lang: row.get(f'{field}_{lang}') or '' for lang in LANGUAGES}
+        try:
+            data['tickets'] = parse_csv_tickets(row.get('tickets'))
+        except InvalidEvent as e:
+            yield number, None, str(e)
+            continue
+        yield number, data, None
+
+
+def _insert_returning_ids(model, rows):
+    # one multi-row INSERT ... RETURNING id per chunk of rows (SQLite 3.35+), with the ids matched to the rows
+    # they were inserted from, whatever other writers insert meanwhile
+    table = model.__table__
+    result = db.session.execute(table.insert().returning(table.c.id, sort_by_parameter_order=True), rows)
+    return [row[0] for row in result]
+
+
+def _write_batch(events):
+    def write():
+        event_rows, text_rows = [], []
+        now = datetime.utcnow()
+        for event, _ in events:
+            event_rows.append({
+                'title': json.dumps(event['title']),
+                'description': json.dumps(event['description'] or {'ru': '', 'en': ''}),
+                'venue': json.dumps(event['venue']),
+                'date': event['date'],
+                'category': event['category'],
+                'image_url': event['image_url'],
+                'created_at': now,
+                'revision': 0
+            })
+        event_ids = _insert_returning_ids(Event, event_rows)
+
+        ticket_rows = []
+        for event_id, (event, tickets) in zip(event_ids, events):
+            for lang in LANGUAGES:
+                text_rows.append({
+                    'event_id': event_id,
+                    'lang': lang,
+                    **{field: (event[field] or {}).get(lang) or '' for field in TEXT_FIELDS}
+                })
+            ticket_rows.extend({'event_id': event_id, **ticket} for ticket in tickets)
+        db.session.execute(EventText.__table__.insert(), text_rows)
+        if ticket_rows:
+            ticket_ids = _insert_returning_ids(Ticket, ticket_rows)
+            db.session.execute(TicketInventory.__table__.insert(), [
+                {'ticket_id': ticket_id, 'sold': 0, 'held': 0, 'available': ticket['capacity']}
+                for ticket_id, ticket in zip(ticket_ids, ticket_rows)
+            ])
+        db.session.commit()
+        return len(events)
+
+    return run_with_retry(write)
+
+
+def import_events(rows, batch_size=IMPORT_BATCH):
+    # validates every row like POST /api/events and inserts the valid ones with one executemany
+    # per table and batch; invalid rows are skipped and reported with their row number
+    started = time.perf_counter()
+    imported = failed = 0
+    errors = []
+    batch = []
+    for number, data, error in rows:
+        if error is None:
+            try:
+                batch.append(validate_event(data))
+            except InvalidEvent as e:
+                error = str(e)
+        if error is not None:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'row': number, 'error': error})
+            continue
+        if len(batch) >= batch_size:
+            imported += _write_batch(batch)
+            batch = []
+    if batch:
+        imported += _write_batch(batch)
+
+    seconds = time.perf_counter() - started
+    return {
+        'imported': imported,
+        'failed': failed,
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round((imported + failed) / seconds, 1) if seconds else None
+    }
+
+
+# export in the import formats, read in id order one batch at a time
+
+def export_event(event):
+    return {
+        'title': event.title,
+        'description': event.description,
+        'date': event.date.isoformat(),
+        'venue': event.venue,
+        'category': event.category,
+        'image_url': event.image_url,
+        'tickets': [{
+            'category': ticket.category,
+            'price': ticket.price,
+            'capacity': ticket.capacity,
+            'ageRestriction': ticket.age_restriction
+        } for ticket in event.tickets]
+    }
+
+
+def iter_export_events(batch_size=EXPORT_BATCH):
+    last_id = 0
+    while True:
+        events = Event.query.options(selectinload(Event.tickets)).filter(
+            Event.id > last_id
+        ).order_by(Event.id).limit(batch_size).all()
+        if not events:
+            return
+        for event in events:
+            yield export_event(event)
+        last_id = events[-1].id
+        db.session.expunge_all()
+
+
+def export_ndjson(batch_size=EXPORT_BATCH):
+    for event in iter_export_events(batch_size):
+        yield json.dumps(event, ensure_ascii=False) + '\n'
+
+
+class _Line:
+    # csv.writer target that hands back the last written line
+    def write(self, value):
+        self.value = value
+
+
+def csv_lines(header, rows):
+    # CSV text one line at a time, for streamed responses
+    line = _Line()
+    writer = csv.writer(line)
+    writer.writerow(header)
+    yield line.value
+    for row in rows:
+        writer.writerow(row)
+        yield line.value
+
+
+def export_csv(batch_size=EXPORT_BATCH):
+    return csv_lines(CSV_COLUMNS, (
+        [(event[field] or {}).get(lang, '') for field in TEXT_FIELDS for lang in LANGUAGES]
+        + [event['date'], event['category'], event['image_url'] or '', ';'.join(
+            f"{t['category']}:{t['price']}:{t['capacity']}:{t['ageRestriction']}" for t in event['tickets']
+        )]
+        for event in iter_export_events(batch_size)
+    ))
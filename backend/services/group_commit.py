@@ -0,0 +1,119 @@
+from concurrent.futures import Future
+import logging
+import queue
+import threading
+import time
+from flask import current_app
+from sqlalchemy.orm import selectinload
+from models import Booking, Event, db
+from services.holds import hold_expiry
+from services.inventory import NotEnoughTickets, reserve_seats, run_with_retry
+
+logger = logging.getLogger(__name__)
+
+
+class BookingRequest:
+    def __init__(self, user_id, event_id, seats, quote):
+        self.user_id = user_id
+        self.event_id = event_id
+        self.seats = seats
+        self.quote = quote  # PriceQuote computed by the request thread
+        self.future = Future()
+
+
+class BookingWriter:
+    # single writer thread for group commit: bookings submitted by request threads are applied
+    # in batches, one transaction (and one fsync) per batch, and each request gets its own result
+    def __init__(self, app, max_batch=100, max_wait=0.005):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_wait = max_wait  # seconds to wait for more requests before committing a batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='booking-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, user_id, event_id, seats, quote):
+        # returns a future resolving to the new booking id, or raising NotEnoughTickets
+        request = BookingRequest(user_id, event_id, seats, quote)
+        self._queue.put(request)
+        return request.future
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                batch = self._next_batch()
+                try:
+                    self._apply(batch)
+                except Exception as e:
+                    logger.error(f"Group commit of {len(batch)} bookings failed: {str(e)}", exc_info=True)
+                    for request in batch:
+                        if not request.future.done():
+                            request.future.set_exception(e)
+                finally:
+                    db.session.remove()
+
+    def _apply(self, batch):
+        def write():
+            events = {}
+            outcomes = []
+            for request in batch:
+                if request.event_id not in events:
+                    events[request.event_id] = Event.query.options(selectinload(Event.tickets)).get(request.event_id)
+                try:
+                    # a failed reservation undoes itself, so the rest of the batch is unaffected
+                    reserve_seats(events[request.event_id], request.seats)
+                except NotEnoughTickets as e:
+                    outcomes.append((request, None, e))
+                    continue
+                booking = Booking(
+                    user_id=request.user_id,
+                    event_id=request.event_id,
+                    lines=request.quote.booking_lines(),
+                    total_price=request.quote.total,
+                    expires_at=hold_expiry()
+                )
+                db.session.add(booking)
+                outcomes.append((request, booking, None))
+
+            # read ids before the commit expires the new rows
+            db.session.flush()
+            outcomes = [(request, booking.id if booking else None, error) for request, booking, error in outcomes]
+            db.session.commit()
+            return outcomes
+
+        for request, booking_id, error in run_with_retry(write):
+            if error:
+                request.future.set_exception(error)
+            else:
+                request.future.set_result(booking_id)
+        logger.debug(f"Group commit applied {len(batch)} booking requests")
+
+
+_writer_lock = threading.Lock()
+
+
+def get_booking_writer():
+    # the writer thread is started on first use in each process
+    app = current_app._get_current_object()
+    with _writer_lock:
+        writer = app.extensions.get('booking_writer')
+        if writer is None:
+            writer = app.extensions['booking_writer'] = BookingWriter(
+                app,
+                max_batch=app.config['BOOKING_GROUP_COMMIT_MAX_BATCH'],
+                max_wait=app.config['BOOKING_GROUP_COMMIT_MAX_WAIT_MS'] / 1000
+            )
+        return writer
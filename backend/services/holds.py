@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+import logging
+import threading
+import time
+from flask import current_app
+from sqlalchemy import func, update
+from models import Booking, BookingLine, Ticket, TicketInventory, db
+from services.cache import invalidate_events
+from services.etags import bump_event_revision
+from services.inventory import run_with_retry
+
+logger = logging.getLogger(__name__)
+
+# expired holds released per transaction
+SWEEP_BATCH = 1000
+
+
+def hold_expiry():
+    # when a booking created (or re-activated as pending) now stops holding its seats
+    return datetime.utcnow() + timedelta(seconds=current_app.config['BOOKING_HOLD_TTL'])
+
+
+def is_hold_expired(booking, now=None):
+    return booking.status == 'pending' and booking.expires_at is not None and booking.expires_at <= (now or datetime.utcnow())
+
+
+def _release_batch(now, batch_size):
+    # one batch: cancel expired pending bookings and return their seats with one UPDATE per ticket
+    booking_ids = [row[0] for row in db.session.query(Booking.id).filter(
+        Booking.expires_at <= now,
+        Booking.status == 'pending'
+    ).order_by(Booking.expires_at).limit(batch_size)]
+    if not booking_ids:
+        return 0
+
+    seats = db.session.query(BookingLine.ticket_id, Ticket.event_id, func.sum(BookingLine.quantity)).join(
+        Ticket, BookingLine.ticket_id == Ticket.id
+    ).filter(BookingLine.booking_id.in_(booking_ids)).group_by(BookingLine.ticket_id, Ticket.event_id).all()
+
+    updated = db.session.execute(
+        update(Booking)
+        .where(Booking.id.in_(booking_ids), Booking.status == 'pending')
+        .values(status='cancelled', expires_at=None, revision=Booking.revision + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if updated != len(booking_ids):
+        # a booking was confirmed or cancelled since it was read, redo the batch
+        db.session.rollback()
+        return -1
+
+    for ticket_id, _, count in seats:
+        db.session.execute(
+            update(Ticket)
+            .where(Ticket.id == ticket_id)
+            .values(capacity=Ticket.capacity + count)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            update(TicketInventory)
+            .where(TicketInventory.ticket_id == ticket_id)
+            .values(held=TicketInventory.held - count, available=TicketInventory.available + count)
+            .execution_options(synchronize_session=False)
+        )
+    event_ids = {event_id for _, event_id, _ in seats}
+    bump_event_revision(*event_ids)
+    db.session.commit()
+    invalidate_events(*event_ids)
+    return len(booking_ids)
+
+
+def expire_holds(now=None, batch_size=SWEEP_BATCH):
+    # the sweep only touches rows found through the booking.expires_at index
+    now = now or datetime.utcnow()
+    released = 0
+    while True:
+        count = run_with_retry(lambda: _release_batch(now, batch_size))
+        if count == 0:
+            break
+        released += max(count, 0)
+    if released:
+        logger.info(f"Released {released} expired booking holds")
+    return released
+
+
+def _sweep_forever(app, interval):
+    while True:
+        time.sleep(interval)
+        with app.app_context():
+            try:
+                expire_holds()
+            except Exception as e:
+                logger.error(f"Hold sweep failed: {str(e)}", exc_info=True)
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+
+_sweeper_lock = threading.Lock()
+
+
+def start_hold_sweeper(app):
+    # started once per process; HOLD_SWEEP_INTERVAL=0 leaves sweeping to sweep_holds.py (cron)
+    interval = app.config['HOLD_SWEEP_INTERVAL']
+    if interval <= 0 or 'hold_sweeper' in app.extensions:
+        return
+    with _sweeper_lock:
+        if 'hold_sweeper' not in app.extensions:
+            thread = threading.Thread(target=_sweep_forever, args=(app, interval), name='hold-sweeper', daemon=True)
+            app.extensions['hold_sweeper'] = thread
+            thread.start()
@@ -0,0 +1,165 @@
+from collections import Counter, defaultdict
+import json
+import logging
+import time
+from sqlalchemy import func, update
+from sqlalchemy.exc import OperationalError
+from models import Booking, BookingLine, Ticket, TicketInventory, db
+from services.etags import bump_event_revision
+
+logger = logging.getLogger(__name__)
+
+# attempts and initial backoff (seconds) when the database reports a lock conflict
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.02
+
+
+class NotEnoughTickets(Exception):
+    def __init__(self, category):
+        super().__init__(f'Not enough tickets for category {category}')
+        self.category = category
+
+
+def decode_seats(raw):
+    # seat categories from the raw JSON column, without loading the Booking object
+    try:
+        return json.loads(raw) if raw else []
+    except ValueError:
+        return []
+
+
+def find_ticket(event, category):
+    return next((t for t in event.tickets if t.category == category), None)
+
+
+def booking_ticket_counts(booking):
+    # (ticket, seats) pairs of a booking; bookings not yet moved to lines fall back to the JSON list
+    if booking.lines:
+        return [(line.ticket, line.quantity) for line in booking.lines]
+    if not booking.event:
+        return []
+    return [(find_ticket(booking.event, category), count) for category, count in Counter(booking.seats).items()]
+
+
+def is_busy_error(error):
+    message = str(getattr(error, 'orig', error)).lower()
+    return 'database is locked' in message or 'database is busy' in message or 'deadlock' in message
+
+
+def run_with_retry(fn, retries=BUSY_RETRIES, backoff=BUSY_BACKOFF):
+    # run a short write transaction, rolling back and retrying it while the database is busy;
+    # fn must do all of its work (including the commit) so a retry starts from scratch
+    for attempt in range(retries):
+        try:
+            return fn()
+        except OperationalError as e:
+            db.session.rollback()
+            if not is_busy_error(e) or attempt == retries - 1:
+                raise
+            logger.warning(f"Database busy, retrying transaction (attempt {attempt + 1})")
+            time.sleep(backoff * (2 ** attempt))
+
+
+def _shift_seats(ticket, count):
+    # move count seats from available to held (negative count moves them back)
+    db.session.execute(
+        update(TicketInventory)
+        .where(TicketInventory.ticket_id == ticket.id)
+        .values(available=TicketInventory.available - count, held=TicketInventory.held + count)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reserve_seats(event, seats):
+    # take seats with one conditional UPDATE per category: the availability check and the
+    # decrement are a single statement, so concurrent buyers can never oversell a category.
+    # categories are locked in a fixed order to keep concurrent transactions from deadlocking.
+    # on failure the categories already taken are given back, leaving the transaction as it was
+    taken = []
+    for category, count in sorted(Counter(seats).items()):
+        ticket = find_ticket(event, category)
+        result = db.session.execute(
+            update(Ticket)
+            .where(Ticket.id == ticket.id, Ticket.capacity >= count)
+            .values(capacity=Ticket.capacity - count)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            for taken_ticket, taken_count in taken:
+                db.session.execute(
+                    update(Ticket)
+                    .where(Ticket.id == taken_ticket.id)
+                    .values(capacity=Ticket.capacity + taken_count)
+                    .execution_options(synchronize_session=False)
+                )
+                _shift_seats(taken_ticket, -taken_count)
+            raise NotEnoughTickets(category)
+
+        _shift_seats(ticket, count)
+        taken.append((ticket, count))
+    bump_event_revision(event.id)
+
+    # the in-memory rows are stale now, reload them on next access
+    for ticket, _ in taken:
+        db.session.expire(ticket, ['capacity'])
+        if ticket.inventory is not None:
+            db.session.expire(ticket.inventory)
+
+
+def move_booking_seats(booking, old_status, new_status):
+    # adjust ticket capacity and inventory counters when a booking changes status;
+    # changes are flushed with the caller's commit so counters and bookings stay in one transaction
+    old_status = old_status or 'pending'
+    if old_status == new_status:
+        return
+    booking.revision = (booking.revision or 0) + 1
+    bump_event_revision(booking.event_id)
+
+    for ticket, count in booking_ticket_counts(booking):
+        if not ticket:
+            continue
+        if ticket.inventory is None:
+            ticket.inventory = TicketInventory(sold=0, held=0, available=ticket.capacity)
+
+        if old_status == 'cancelled':
+            # re-activating a cancelled booking takes its seats again
+            if ticket.capacity < count:
+                raise NotEnoughTickets(ticket.category)
+            ticket.capacity -= count
+        elif new_status == 'cancelled':
+            ticket.capacity += count
+
+        ticket.inventory.remove(old_status, count)
+        ticket.inventory.add(new_status, count)
+
+
+def rebuild_inventory(fix=False):
+    # recount sold/held seats from bookings and compare them with the stored counters;
+    # available mirrors ticket capacity, which already has active bookings subtracted
+    expected = defaultdict(lambda: {'sold': 0, 'held': 0})
+    rows = db.session.query(BookingLine.ticket_id, Booking.status, func.sum(BookingLine.quantity)).join(
+        Booking, BookingLine.booking_id == Booking.id
+    ).filter(Booking.status != 'cancelled').group_by(BookingLine.ticket_id, Booking.status)
+    for ticket_id, status, count in rows:
+        counter = 'sold' if status == 'confirmed' else 'held'
+        expected[ticket_id][counter] += count
+
+    mismatches = []
+    for ticket in Ticket.query.order_by(Ticket.id):
+        counts = expected[ticket.id]
+        wanted = {'sold': counts['sold'], 'held': counts['held'], 'available': ticket.capacity}
+        inventory = ticket.inventory
+        actual = inventory.to_dict() if inventory else None
+        if actual is None or any(actual[key] != value for key, value in wanted.items()):
+            mismatches.append({'ticket_id': ticket.id, 'expected': wanted, 'actual': actual})
+            if fix:
+                if inventory is None:
+                    ticket.inventory = inventory = TicketInventory()
+                inventory.sold = wanted['sold']
+                inventory.held = wanted['held']
+                inventory.available = wanted['available']
+
+    if fix and mismatches:
+        db.session.commit()
+        logger.info(f"Inventory rebuilt for {len(mismatches)} ticket categories")
+    return mismatches
@@ -0,0 +1,124 @@
+import atexit
+from datetime import datetime, timezone
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+
+
+class JsonFormatter(logging.Formatter):
+    # one JSON object per line, for log shippers
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    # passes WARNING and above always, and a fraction of the lower-level records of hot loggers
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates  # logger name prefix -> fraction of records kept
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        name = record.name
+        while name:
+            if name in self.rates:
+                return random.random() < self.rates[name]
+            name = name.rpartition('.')[0]
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    # never blocks the request thread: when the writer falls behind, records are dropped and counted
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_levels(spec):
+    # "routes.events=WARNING,werkzeug=ERROR" -> {'routes.events': 'WARNING', 'werkzeug': 'ERROR'}
+    levels = {}
+    for part in spec.split(','):
+        if part.strip():
+            name, _, level = part.partition('=')
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def parse_rates(spec):
+    # "routes.bookings=0.01" -> {'routes.bookings': 0.01}
+    return {name: float(rate) for name, rate in parse_levels(spec).items()}
+
+
+_listener = None
+
+
+def configure_logging(mode='debug', level=None, module_levels='', sample_rates='', queue_size=10000, stream=None):
+    # debug: everything at DEBUG, plain text written by the logging thread itself (the old behaviour).
+    # production: INFO and up as JSON lines, handed to a background writer through a bounded queue,
+    # with per-module levels and sampling of chatty loggers. Safe to call again to switch modes
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    if mode == 'production':
+        output.setFormatter(JsonFormatter())
+        log_queue = queue.Queue(maxsize=queue_size)
+        handler = DroppingQueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        root.setLevel(level or 'INFO')
+    else:
+        output.setFormatter(logging.Formatter('%(levelname)s:%(name)s:%(message)s'))
+        handler = output
+        root.setLevel(level or 'DEBUG')
+
+    rates = parse_rates(sample_rates)
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+    root.addHandler(handler)
+
+    for name, module_level in parse_levels(module_levels).items():
+        logging.getLogger(name).setLevel(module_level)
+    return handler
+
+
+def _stop_listener():
+    # flush what is still queued when the process exits
+    if _listener is not None:
+        _listener.stop()
+
+
+atexit.register(_stop_listener)
+
+
+def init_logging(app):
+    return configure_logging(
+        mode=app.config['LOG_MODE'],
+        level=app.config['LOG_LEVEL'] or None,
+        module_levels=app.config['LOG_LEVELS'],
+        sample_rates=app.config['LOG_SAMPLE']
+    )
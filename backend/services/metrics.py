@@ -0,0 +1,152 @@
+import cProfile
+import logging
+import os
+import random
+import threading
+import time
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# histogram bucket upper bounds: request and DB time in seconds, statement counts per request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class RequestMetrics:
+    # per-route request counters and histograms for this process, rendered in the Prometheus text format.
+    # routes are labelled by their URL rule (/api/events/<int:event_id>), so label values stay bounded
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}  # (method, route, status) -> count
+        self._latency = {}  # (method, route) -> Histogram of seconds
+        self._queries = {}  # (method, route) -> Histogram of SQL statements per request
+        self._db_time = {}  # (method, route) -> Histogram of seconds spent in SQL per request
+
+    def observe(self, method, route, status, seconds, queries, db_seconds):
+        key = (method, route)
+        with self._lock:
+            self._requests[(method, route, status)] = self._requests.get((method, route, status), 0) + 1
+            self._latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self._queries.setdefault(key, Histogram(QUERY_BUCKETS)).observe(queries)
+            self._db_time.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(db_seconds)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines.append('# HELP http_requests_total Requests handled, by route and status.')
+            lines.append('# TYPE http_requests_total counter')
+            for (method, route, status), count in sorted(self._requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+            for name, help_text, histograms in [
+                ('http_request_duration_seconds', 'Request latency.', self._latency),
+                ('http_request_db_queries', 'SQL statements per request.', self._queries),
+                ('http_request_db_seconds', 'Time spent in SQL per request.', self._db_time),
+            ]:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (method, route), histogram in sorted(histograms.items()):
+                    lines.extend(histogram.render(name, f'method="{method}",route="{route}"'))
+        return '\n'.join(lines) + '\n'
+
+
+def _route():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics_started' in g:
+        g.metrics_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics_query_started' in g:
+        g.metrics_queries += 1
+        g.metrics_db_seconds += time.perf_counter() - g.pop('metrics_query_started')
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_queries = 0
+    g.metrics_db_seconds = 0.0
+    sample_rate = current_app.config['METRICS_PROFILE_SAMPLE_RATE']
+    if sample_rate and random.random() < sample_rate:
+        g.metrics_profiler = cProfile.Profile()
+        g.metrics_profiler.enable()
+
+
+def _dump_profile(profiler, seconds):
+    # one .prof file per sampled request, readable with `python -m pstats` or snakeviz
+    directory = current_app.config['METRICS_PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    endpoint = (request.endpoint or 'unmatched').replace('.', '-')
+    path = os.path.join(directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{endpoint}-{int(seconds * 1000)}ms.prof')
+    profiler.dump_stats(path)
+    logger.info(f"Profile of {request.method} {request.path} written to {path}")
+
+
+def _finish_request(response):
+    # latency is measured until the response object is ready; a streamed body is not included
+    if 'metrics_started' not in g:
+        return response
+    seconds = time.perf_counter() - g.pop('metrics_started')
+    profiler = g.pop('metrics_profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _dump_profile(profiler, seconds)
+    get_metrics().observe(request.method, _route(), response.status_code, seconds, g.metrics_queries, g.metrics_db_seconds)
+    return response
+
+
+_listeners_lock = threading.Lock()
+_listening = False
+
+
+def init_metrics(app):
+    app.extensions['metrics'] = RequestMetrics()
+    if not app.config['METRICS_ENABLED']:
+        return app.extensions['metrics']
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    # listeners on the Engine class cover every engine Flask-SQLAlchemy creates, without an app context
+    global _listening
+    with _listeners_lock:
+        if not _listening:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            _listening = True
+    return app.extensions['metrics']
+
+
+def get_metrics():
+    return current_app.extensions['metrics']
@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+from flask import request
+from sqlalchemy import DateTime, and_, or_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def wants_cursor():
+    # cursor mode is opt-in: ?cursor= (empty) asks for the first page, later pages pass next_cursor back
+    return 'cursor' in request.args
+
+
+def encode_cursor(values):
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+                for column, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def keyset_filter(columns, values):
+    # rows strictly after the cursor in descending (c1, ..., cn) order:
+    # c1 < v1 OR (c1 = v1 AND c2 < v2) OR ...
+    # the extra c1 <= v1 bound lets the database start the index range at the cursor
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, column < value))
+    if len(columns) == 1:
+        return clauses[0]
+    return and_(columns[0] <= values[0], or_(*clauses))
+
+
+def keyset_page(query, columns, per_page, cursor):
+    # one page in descending column order without OFFSET or COUNT(*); the last column must be unique.
+    # cost stays the same however deep the page is, as long as an index covers the columns
+    if cursor:
+        query = query.filter(keyset_filter(columns, decode_cursor(cursor, columns)))
+    rows = query.order_by(*[column.desc() for column in columns]).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in columns])
+    return rows, next_cursor
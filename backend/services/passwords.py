@@ -0,0 +1,82 @@
+from concurrent.futures import ProcessPoolExecutor
+import threading
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    # more password hashes waiting than PASSWORD_HASH_MAX_PENDING; the caller answers 503
+    pass
+
+
+class PasswordHasher:
+    # password hashing off the request threads: a small process pool does the key stretching, so a
+    # login burst takes CPU from hashing workers rather than holding the GIL of the server process.
+    # at most max_pending hashes are queued or running; beyond that requests fail fast
+    def __init__(self, method='pbkdf2:sha256', workers=2, max_pending=32, timeout=10):
+        self.method = method
+        self.timeout = timeout
+        self._pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _run(self, fn, *args):
+        if self._pool is None:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy('Too many login requests, try again shortly')
+        try:
+            return self._pool.submit(fn, *args).result(timeout=self.timeout)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        if not password_hash:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def needs_rehash(self, password_hash):
+        # "pbkdf2:sha256:600000$salt$hash" against the configured method; only the parts the
+        # configuration names are compared, so "pbkdf2:sha256" accepts any iteration count
+        stored = password_hash.split('$', 1)[0].split(':')
+        wanted = self.method.split(':')
+        return stored[:len(wanted)] != wanted
+
+
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher():
+    # the pool is started on first use in each process, after any pre-fork
+    app = current_app._get_current_object()
+    with _hasher_lock:
+        hasher = app.extensions.get('password_hasher')
+        if hasher is None:
+            hasher = app.extensions['password_hasher'] = PasswordHasher(
+                method=app.config['PASSWORD_HASH_METHOD'],
+                workers=app.config['PASSWORD_HASH_WORKERS'],
+                max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+                timeout=app.config['PASSWORD_HASH_TIMEOUT']
+            )
+        return hasher
+
+
+def hash_password(password):
+    return get_password_hasher().hash(password)
+
+
+def verify_password(user, password):
+    # checks the password and, when the hash was made with other parameters than the configured
+    # ones, replaces it with a fresh hash; the caller commits
+    hasher = get_password_hasher()
+    if not hasher.verify(user.password_hash, password):
+        return False
+    if hasher.needs_rehash(user.password_hash):
+        user.password_hash = hasher.hash(password)
+    return True
@@ -0,0 +1,102 @@
+from collections import Counter
+import threading
+import time
+from flask import current_app
+from models import BookingLine, Ticket, db
+
+
+class UnknownCategory(ValueError):
+    def __init__(self, category):
+        super().__init__(f'Ticket category not found: {category}')
+        self.category = category
+
+
+def parse_quantity_discounts(spec):
+    # "10:5,50:10" -> [(50, 10.0), (10, 5.0)]: percent off the unit price from that many seats of one category
+    rules = []
+    for part in spec.split(','):
+        if part.strip():
+            quantity, percent = part.split(':')
+            rules.append((int(quantity), float(percent)))
+    return sorted(rules, reverse=True)
+
+
+class PriceQuote:
+    def __init__(self, event_id, lines):
+        self.event_id = event_id
+        self.lines = lines  # (ticket_id, category, quantity, unit_price), one per category
+        self.total = round(sum(quantity * unit_price for _, _, quantity, unit_price in lines), 2)
+
+    def booking_lines(self):
+        return [BookingLine(ticket_id=ticket_id, quantity=quantity, unit_price=unit_price)
+                for ticket_id, _, quantity, unit_price in self.lines]
+
+
+class PriceBook:
+    # per-event price tables {category: (ticket_id, price)} kept in memory per process, so pricing
+    # an order costs one dict lookup per category; ticket writes drop the event's table and the TTL
+    # bounds how long other processes keep an old price
+    def __init__(self, discounts=(), ttl=60, clock=time.monotonic):
+        self.discounts = list(discounts)  # (min quantity, percent off), largest quantity first
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._tables = {}  # event_id -> (table, expires_at)
+        self._generation = 0  # bumped by invalidate, so a table read before it is not stored
+
+    def table(self, event_id):
+        now = self.clock()
+        with self._lock:
+            entry = self._tables.get(event_id)
+            generation = self._generation
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        table = {
+            category: (ticket_id, price)
+            for ticket_id, category, price in db.session.query(
+                Ticket.id, Ticket.category, Ticket.price
+            ).filter_by(event_id=event_id)
+        }
+        with self._lock:
+            if generation == self._generation:
+                self._tables[event_id] = (table, now + self.ttl)
+        return table
+
+    def unit_price(self, price, quantity):
+        for min_quantity, percent in self.discounts:
+            if quantity >= min_quantity:
+                return round(price * (100 - percent) / 100, 2)
+        return price
+
+    def quote(self, event_id, seats):
+        # one pass over the requested categories; raises UnknownCategory for a category the event does not sell
+        table = self.table(event_id)
+        lines = []
+        for category, quantity in sorted(Counter(seats).items()):
+            entry = table.get(category)
+            if entry is None:
+                raise UnknownCategory(category)
+            ticket_id, price = entry
+            lines.append((ticket_id, category, quantity, self.unit_price(price, quantity)))
+        return PriceQuote(event_id, lines)
+
+    def invalidate(self, *event_ids):
+        with self._lock:
+            self._generation += 1
+            for event_id in event_ids:
+                self._tables.pop(event_id, None)
+
+    def __len__(self):
+        return len(self._tables)
+
+
+def init_pricing(app):
+    app.extensions['price_book'] = PriceBook(
+        discounts=parse_quantity_discounts(app.config['PRICE_QUANTITY_DISCOUNTS']),
+        ttl=app.config['PRICE_CACHE_TTL']
+    )
+    return app.extensions['price_book']
+
+
+def get_price_book():
+    return current_app.extensions['price_book']
@@ -0,0 +1,209 @@
+from collections import OrderedDict
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from flask import current_app, jsonify, request
+from flask_login import current_user
+
+logger = logging.getLogger(__name__)
+
+# endpoints that are rate limited, by route group; other requests skip the limiter with one dict lookup
+ROUTE_GROUPS = {
+    'bookings.create_booking': 'bookings',
+    'auth.login': 'login',
+    'auth.register': 'register',
+}
+
+
+def parse_limits(spec):
+    # "bookings.user=10/10,login.ip=20/60" -> {('bookings', 'user'): (1.0, 10), ('login', 'ip'): (0.333, 20)}:
+    # requests per period in seconds become a token bucket of that many tokens, refilled at count/period per second
+    limits = {}
+    for part in spec.split(','):
+        if part.strip():
+            name, _, rule = part.partition('=')
+            group, _, scope = name.strip().partition('.')
+            if scope not in ('user', 'ip'):
+                raise ValueError(f'Rate limit {name.strip()} must end in .user or .ip')
+            count, _, period = rule.partition('/')
+            limits[(group, scope)] = (int(count) / float(period or 1), int(count))
+    return limits
+
+
+class MemoryBuckets:
+    # token buckets in a dict per process: a check is a lookup and a few float operations under a lock.
+    # least recently used buckets beyond max_entries are dropped, which only ever gives a client a full bucket back
+    name = 'memory'
+
+    def __init__(self, max_entries=100000, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> [tokens, updated_at]
+
+    def take(self, key, rate, burst):
+        # returns 0 when a token was taken, otherwise seconds until one is available
+        with self._lock:
+            now = self.clock()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(burst), now]
+                if len(self._buckets) > self.max_entries:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0
+            return (1 - bucket[0]) / rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBuckets:
+    # buckets shared by the worker processes of one host through a small SQLite file of their own,
+    # so limiter writes never wait on the main database's write lock
+    name = 'sqlite'
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS rate_bucket (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # bucket state is disposable: losing the last writes in a crash only refills some buckets
+            conn.execute('PRAGMA synchronous=OFF')
+        return conn
+
+    def take(self, key, rate, burst):
+        conn = self._connect()
+        now = self.clock()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated_at FROM rate_bucket WHERE key = ?', (key,)).fetchone()
+            tokens = float(burst) if row is None else min(burst, row[0] + max(0.0, now - row[1]) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            conn.execute('INSERT OR REPLACE INTO rate_bucket (key, tokens, updated_at) VALUES (?, ?, ?)', (key, tokens, now))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def clear(self):
+        self._connect().execute('DELETE FROM rate_bucket')
+
+
+# refill, take and expire in one round trip; the script runs atomically on the server
+TAKE_SCRIPT = """
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or burst
+tokens = math.min(burst, tokens + math.max(0, now - (tonumber(bucket[2]) or now)) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    # buckets shared by every worker on every host; any Redis-compatible server works
+    name = 'redis'
+
+    def __init__(self, url, prefix='ticketarena:ratelimit:', clock=time.time):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RATE_LIMIT_BACKEND=redis requires the redis package (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.clock = clock
+        self._take = self.client.register_script(TAKE_SCRIPT)
+
+    def take(self, key, rate, burst):
+        return float(self._take(keys=[self.prefix + key], args=[rate, burst, self.clock()]))
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class RateLimiter:
+    # a request in a limited group takes one token from the bucket of its user (when logged in) and of its IP,
+    # for each of those scopes that has a limit configured
+    def __init__(self, store, limits):
+        self.store = store
+        self.limits = limits
+        self.rejected = 0
+
+    def check(self, group, user_id, ip):
+        # seconds the client has to wait, 0 when the request may go ahead
+        for scope, identity in (('user', user_id), ('ip', ip)):
+            limit = self.limits.get((group, scope))
+            if limit is None or identity is None:
+                continue
+            wait = self.store.take(f'{group}:{scope}:{identity}', *limit)
+            if wait:
+                self.rejected += 1
+                return wait
+        return 0
+
+
+def _limit_request():
+    group = ROUTE_GROUPS.get(request.endpoint)
+    if group is None:
+        return None
+    limiter = current_app.extensions['rate_limiter']
+    if limiter is None:
+        return None
+    user_id = current_user.id if current_user.is_authenticated else None
+    try:
+        wait = limiter.check(group, user_id, request.remote_addr)
+    except Exception as e:
+        # a shared store that is down must not take the endpoints with it
+        logger.error(f"Rate limit check failed: {str(e)}")
+        return None
+    if not wait:
+        return None
+    retry_after = max(1, math.ceil(wait))
+    response = jsonify({'error': 'Too many requests, try again later', 'retry_after': retry_after})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+
+def init_rate_limiter(app):
+    backend = app.config['RATE_LIMIT_BACKEND']
+    limits = parse_limits(app.config['RATE_LIMITS'])
+    if backend == 'memory':
+        store = MemoryBuckets(max_entries=app.config['RATE_LIMIT_MAX_ENTRIES'])
+    elif backend == 'sqlite':
+        store = SQLiteBuckets(app.config['RATE_LIMIT_SQLITE_PATH'])
+    elif backend == 'redis':
+        store = RedisBuckets(app.config['RATE_LIMIT_REDIS_URL'])
+    else:
+        store = None
+    app.extensions['rate_limiter'] = RateLimiter(store, limits) if store and limits else None
+    app.before_request(_limit_request)
+    return app.extensions['rate_limiter']
+
+
+def get_rate_limiter():
+    return current_app.extensions['rate_limiter']
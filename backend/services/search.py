@@ -0,0 +1,100 @@
+import logging
+import re
+from sqlalchemy import and_, column, exists, func, literal_column, or_, table, text
+from sqlalchemy.exc import OperationalError
+from models import Event, EventText, db
+
+logger = logging.getLogger(__name__)
+
+# FTS5 index over event_text: one row per event (rowid = event.id), both languages in each column.
+# triggers on event_text keep it in sync with every event create, update and delete
+SEARCH_TABLE = 'event_search'
+
+# bm25 column weights: title, venue, description
+RANK_WEIGHTS = (10.0, 3.0, 1.0)
+
+# words shorter than this are not searched as prefixes (they would match most of the index)
+MIN_PREFIX = 2
+
+_REFRESH = (
+    f"DELETE FROM {SEARCH_TABLE} WHERE rowid = {{row}}.event_id; "
+    f"INSERT INTO {SEARCH_TABLE} (rowid, title, venue, description) "
+    "SELECT event_id, group_concat(title, ' '), group_concat(venue, ' '), group_concat(description, ' ') "
+    "FROM event_text WHERE event_id = {row}.event_id GROUP BY event_id;"
+)
+
+SEARCH_SCHEMA = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "title, venue, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS event_text_search_insert AFTER INSERT ON event_text BEGIN {_REFRESH.format(row='new')} END",
+    f"CREATE TRIGGER IF NOT EXISTS event_text_search_update AFTER UPDATE ON event_text BEGIN "
+    f"{_REFRESH.format(row='old')} {_REFRESH.format(row='new')} END",
+    f"CREATE TRIGGER IF NOT EXISTS event_text_search_delete AFTER DELETE ON event_text BEGIN {_REFRESH.format(row='old')} END",
+]
+
+search_table = table(SEARCH_TABLE, column('rowid'))
+
+
+def create_search_index():
+    # returns False on databases other than SQLite or a SQLite build without FTS5;
+    # search then falls back to LIKE over event_text
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    try:
+        for statement in SEARCH_SCHEMA:
+            db.session.execute(text(statement))
+    except OperationalError as e:
+        if 'fts5' not in str(e).lower():
+            raise
+        db.session.rollback()
+        logger.warning("SQLite has no FTS5 module, event search will use LIKE")
+        return False
+    return True
+
+
+def rebuild_search_index():
+    # refill the index from event_text, e.g. after the triggers were created on existing data
+    db.session.execute(text(f'DELETE FROM {SEARCH_TABLE}'))
+    db.session.execute(text(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, title, venue, description) "
+        "SELECT event_id, group_concat(title, ' '), group_concat(venue, ' '), group_concat(description, ' ') "
+        "FROM event_text GROUP BY event_id"
+    ))
+
+
+def search_available():
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    return db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': SEARCH_TABLE}
+    ).first() is not None
+
+
+def search_terms(phrase):
+    # words of the user's input, lower-cased; punctuation and FTS operators are dropped
+    return re.findall(r'\w+', phrase.lower())
+
+
+def match_expression(terms):
+    # every word must match; words of MIN_PREFIX letters or more also match as prefixes
+    return ' AND '.join(f'"{term}"*' if len(term) >= MIN_PREFIX else f'"{term}"' for term in terms)
+
+
+def apply_search(query, phrase):
+    # filters an Event query to matches of phrase and orders it by relevance (best first);
+    # returns None if the phrase has no searchable words
+    terms = search_terms(phrase)
+    if not terms:
+        return None
+    if search_available():
+        rank = func.bm25(literal_column(SEARCH_TABLE), *RANK_WEIGHTS)
+        return query.join(search_table, search_table.c.rowid == Event.id).filter(
+            literal_column(SEARCH_TABLE).op('MATCH')(match_expression(terms))
+        ).order_by(rank, Event.id)
+    for term in terms:
+        pattern = f'%{term}%'
+        query = query.filter(exists().where(and_(
+            EventText.event_id == Event.id,
+            or_(EventText.title.ilike(pattern), EventText.venue.ilike(pattern), EventText.description.ilike(pattern))
+        )))
+    return query.order_by(Event.date.desc(), Event.id.desc())
@@ -0,0 +1,80 @@
+from flask import current_app
+from flask_login import UserMixin
+from models import User
+from services.cache import MemoryCache, NullCache
+
+# the columns authorization checks and User.to_dict() need
+SNAPSHOT_FIELDS = ('id', 'name', 'email', 'role', 'is_active', 'avatar_url', 'created_at')
+
+
+class CachedUser(UserMixin):
+    # the logged-in user as cached: enough for current_user.id, is_admin() and to_dict() without a query.
+    # any other attribute (check_password, bookings, ...) and every write load the real User row first,
+    # so handlers can keep treating current_user as the model
+    def __init__(self, snapshot):
+        object.__setattr__(self, '_snapshot', snapshot)
+        object.__setattr__(self, '_model', None)
+
+    def _load(self):
+        if self._model is None:
+            object.__setattr__(self, '_model', User.query.get(self._snapshot['id']))
+        return self._model
+
+    def __getattr__(self, name):
+        # only reached for names this class does not define
+        if self._model is None and name in self._snapshot:
+            return self._snapshot[name]
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    @property
+    def is_active(self):
+        return self.__getattr__('is_active') is not False
+
+    def get_id(self):
+        return str(self._snapshot['id'])
+
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def to_dict(self):
+        if self._model is not None:
+            return self._model.to_dict()
+        snapshot = dict(self._snapshot)
+        snapshot['created_at'] = snapshot['created_at'].isoformat()
+        return snapshot
+
+
+def init_user_cache(app):
+    ttl = app.config['USER_CACHE_TTL']
+    if ttl > 0:
+        cache = MemoryCache(max_entries=app.config['USER_CACHE_MAX_ENTRIES'], ttl=ttl)
+    else:
+        cache = NullCache()
+    app.extensions['user_cache'] = cache
+    return cache
+
+
+def user_tag(user_id):
+    return f'user:{user_id}'
+
+
+def load_cached_user(user_id):
+    # Flask-Login user loader: one query per user per USER_CACHE_TTL instead of one per request
+    cache = current_app.extensions['user_cache']
+    key = str(user_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        user = User.query.get(int(user_id))
+        if user is None:
+            return None
+        snapshot = {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+        cache.set(key, snapshot, [user_tag(user.id)])
+    return CachedUser(snapshot)
+
+
+def invalidate_user(user_id):
+    # after any change to a user's row; other processes notice within USER_CACHE_TTL
+    current_app.extensions['user_cache'].invalidate([user_tag(user_id)])
@@ -0,0 +1,143 @@
+from collections import OrderedDict, deque
+import secrets
+import threading
+import time
+from flask import current_app
+
+
+class EventQueue:
+    def __init__(self, now):
+        self.pending = deque()  # tokens waiting for admission, in arrival order
+        self.issued = 0  # sequence number of the next token
+        self.released = 0  # number of tokens admitted so far
+        self.credit = 1.0  # admissions earned but not used yet; an idle queue admits at once
+        self.last_tick = now
+
+
+class WaitingRoom:
+    # in-process admission queue: buyers take a token per event and are let through to
+    # POST /api/bookings at a fixed rate; state lives in memory, so it is per worker process
+    def __init__(self, rate=50.0, admit_ttl=300, clock=time.monotonic):
+        self.rate = rate  # admissions per second per event
+        self.admit_ttl = admit_ttl  # seconds an admitted token stays valid
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._queues = {}  # event_id -> EventQueue
+        self._tokens = {}  # token -> (event_id, user_id, seq) while waiting
+        self._admitted = OrderedDict()  # token -> (event_id, user_id, admitted_at), oldest first
+        self._claimed = set()  # admitted tokens with a booking in progress
+
+    def _tick(self, event_id, queue, now):
+        # earn admission credit for the elapsed time and release that many waiting tokens;
+        # credit is capped while the queue is empty so idle time cannot let a whole burst in at once
+        queue.credit += (now - queue.last_tick) * self.rate
+        queue.last_tick = now
+        while queue.pending and queue.credit >= 1:
+            token = queue.pending.popleft()
+            _, user_id, _ = self._tokens.pop(token)
+            self._admitted[token] = (event_id, user_id, now)
+            queue.released += 1
+            queue.credit -= 1
+        if not queue.pending:
+            queue.credit = min(queue.credit, 1.0)
+
+        # admitted tokens expire in admission order
+        while self._admitted:
+            token, (_, _, admitted_at) = next(iter(self._admitted.items()))
+            if now - admitted_at <= self.admit_ttl:
+                break
+            self._admitted.popitem(last=False)
+            self._claimed.discard(token)
+
+    def _queue(self, event_id, now):
+        queue = self._queues.get(event_id)
+        if queue is None:
+            queue = self._queues[event_id] = EventQueue(now)
+        self._tick(event_id, queue, now)
+        return queue
+
+    def join(self, event_id, user_id):
+        with self._lock:
+            now = self.clock()
+            queue = self._queue(event_id, now)
+            token = secrets.token_urlsafe(16)
+            self._tokens[token] = (event_id, user_id, queue.issued)
+            queue.issued += 1
+            queue.pending.append(token)
+            self._tick(event_id, queue, now)
+            return self._status(token, now)
+
+    def status(self, token):
+        with self._lock:
+            now = self.clock()
+            entry = self._tokens.get(token) or self._admitted.get(token)
+            if entry is None:
+                return None
+            self._queue(entry[0], now)
+            return self._status(token, now)
+
+    def _status(self, token, now):
+        if token in self._admitted:
+            event_id, _, admitted_at = self._admitted[token]
+            return {
+                'token': token,
+                'event_id': event_id,
+                'admitted': True,
+                'position': 0,
+                'eta': 0,
+                'expires_in': max(0, round(self.admit_ttl - (now - admitted_at)))
+            }
+        if token not in self._tokens:
+            return None
+        event_id, _, seq = self._tokens[token]
+        queue = self._queues[event_id]
+        position = seq - queue.released + 1
+        return {
+            'token': token,
+            'event_id': event_id,
+            'admitted': False,
+            'position': position,
+            'eta': round(max(0.0, position - queue.credit) / self.rate, 1) if self.rate else None
+        }
+
+    def is_admitted(self, token, event_id, user_id):
+        with self._lock:
+            now = self.clock()
+            self._queue(event_id, now)
+            entry = self._admitted.get(token)
+            return entry is not None and entry[0] == event_id and entry[1] == user_id
+
+    def claim(self, token, event_id, user_id):
+        # check the admission and reserve it for one booking in the same step, so concurrent requests
+        # with the same token cannot all get through before the first one consumes it
+        with self._lock:
+            now = self.clock()
+            self._queue(event_id, now)
+            entry = self._admitted.get(token)
+            if entry is None or entry[0] != event_id or entry[1] != user_id or token in self._claimed:
+                return False
+            self._claimed.add(token)
+            return True
+
+    def release(self, token):
+        # the booking failed: the admission can be used again
+        with self._lock:
+            self._claimed.discard(token)
+
+    def consume(self, token):
+        # an admitted token is good for one booking
+        with self._lock:
+            self._admitted.pop(token, None)
+            self._claimed.discard(token)
+
+
+def init_waiting_room(app):
+    app.extensions['waiting_room'] = WaitingRoom(
+        rate=app.config['WAITING_ROOM_RATE'],
+        admit_ttl=app.config['WAITING_ROOM_ADMIT_TTL']
+    )
+    return app.extensions['waiting_room']
+
+
+def get_waiting_room():
+    return current_app.extensions['waiting_room']
@@ -0,0 +1,12 @@
+from app import app
+from services.holds import expire_holds
+
+def sweep_holds():
+    # one sweep of expired pending bookings, for running from cron with HOLD_SWEEP_INTERVAL=0
+    with app.app_context():
+        released = expire_holds()
+        print(f'Released {released} expired booking holds')
+        return released
+
+if __name__ == '__main__':
+    sweep_holds()
@@ -0,0 +1,33 @@
+import sys
+from app import app
+from services.cache import invalidate_events
+from services.event_io import export_csv, export_ndjson, import_events, read_csv, read_ndjson
+
+# python transfer_events.py import fixtures.ndjson|fixtures.csv
+# python transfer_events.py export events.ndjson|events.csv
+
+def import_file(path):
+    with app.app_context(), open(path, encoding='utf-8-sig', newline='') as lines:
+        report = import_events(read_csv(lines) if path.endswith('.csv') else read_ndjson(lines))
+        if report['imported']:
+            invalidate_events(listing=True)
+        for error in report['errors']:
+            print(f"Row {error['row']}: {error['error']}")
+        print(f"Imported {report['imported']} events, {report['failed']} rows failed "
+              f"({report['rows_per_sec']} rows/sec)")
+        return report
+
+def export_file(path):
+    with app.app_context(), open(path, 'w', encoding='utf-8', newline='') as out:
+        for chunk in (export_csv() if path.endswith('.csv') else export_ndjson()):
+            out.write(chunk)
+    print(f'Exported events to {path}')
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] not in ('import', 'export'):
+        print('usage: python transfer_events.py import|export <file.ndjson|file.csv>')
+        sys.exit(2)
+    if sys.argv[1] == 'import':
+        report = import_file(sys.argv[2])
+        sys.exit(1 if report['failed'] else 0)
+    export_file(sys.argv[2])